@@ -0,0 +1,56 @@
+"""
+Compares encode latency and throughput of the torch, onnx and onnx-int8
+backends for the embedding and scoring models at batch sizes 1, 8 and 32.
+
+    python -m benchmarks.inference_backends --repeats 20
+"""
+
+import argparse
+import statistics
+import time
+
+from common.model_backends import load_sentence_transformer, parity_score
+
+MODELS = ["all-MiniLM-L6-v2", "anass1209/resume-job-matcher-all-MiniLM-L6-v2"]
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+SAMPLE_TEXT = (
+    "Designed and operated a FastAPI microservice platform on Kubernetes, "
+    "integrating MongoDB Atlas vector search and Redis session storage for 50k daily users."
+)
+
+def bench(model, batch_size: int, repeats: int) -> dict:
+    texts = [f"{SAMPLE_TEXT} #{i}" for i in range(batch_size)]
+    model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    return {"latency_ms": median * 1000, "texts_per_sec": batch_size / median}
+
+def main(args: argparse.Namespace) -> None:
+    for model_name in args.models:
+        print(f"\n{model_name}")
+        print(f"{'backend':>10} {'batch':>6} {'latency ms':>11} {'texts/s':>9} {'parity':>8}")
+        reference, _ = load_sentence_transformer(model_name, backend="torch")
+        for backend in args.backends:
+            model, _ = load_sentence_transformer(
+                model_name, backend=backend, export_root=args.export_dir, verify_parity=False
+            )
+            parity = parity_score(model, reference)
+            for batch_size in args.batch_sizes:
+                result = bench(model, batch_size, args.repeats)
+                print(
+                    f"{backend:>10} {batch_size:>6} {result['latency_ms']:>11.2f} "
+                    f"{result['texts_per_sec']:>9.1f} {parity:>8.4f}"
+                )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--export-dir", default="onnx_models")
+    main(parser.parse_args())
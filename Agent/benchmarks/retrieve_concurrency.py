@@ -0,0 +1,66 @@
+"""
+Measures /retrieve/{user_id} throughput of a running embedding service at
+increasing numbers of in-flight requests.
+
+    python -m benchmarks.retrieve_concurrency --url http://localhost:8001 --user-id user123
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+EMBEDDING_DIM = 384
+
+def _random_query() -> list:
+    vector = [random.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIM)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+async def _run_level(client: httpx.AsyncClient, url: str, concurrency: int, total: int, top_k: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(url, json={"query_embedding": _random_query(), "top_k": top_k})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests_per_sec": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+async def main(args: argparse.Namespace) -> None:
+    url = f"{args.url.rstrip('/')}/retrieve/{args.user_id}"
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        # Warm-up: triggers autonomous indexing and fills connection pools.
+        await _run_level(client, url, 1, 5, args.top_k)
+        print(f"{'in-flight':>10} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+        for concurrency in args.levels:
+            result = await _run_level(client, url, concurrency, args.requests, args.top_k)
+            print(
+                f"{result['concurrency']:>10} {result['requests_per_sec']:>10.1f} "
+                f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    asyncio.run(main(parser.parse_args()))
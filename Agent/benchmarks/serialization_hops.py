@@ -0,0 +1,106 @@
+"""
+Per-hop CPU time of passing a /retrieve result (top_k chunks) from the embedding
+service through the retrieval service to the generator: the pydantic path every
+hop used to take, against the orjson / raw-bytes passthrough path.
+
+    python -m benchmarks.serialization_hops --top-k 50 --iterations 2000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from common import serialization
+from embedding import schemas as embedding_schemas
+from retrieval import schemas as retrieval_schemas
+from generator import schemas as generator_schemas
+
+WORDS = (
+    "designed built operated scaled python fastapi kubernetes mongodb redis pipelines latency "
+    "throughput team migrated platform reduced improved services observability terraform aws"
+).split()
+
+def _search_results(top_k: int) -> List[Dict[str, Any]]:
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        {
+            "_id": f"{random.getrandbits(256):064x}",
+            "user_id": "user12345",
+            "index_namespace": "profile",
+            "section_id": "experience",
+            "source_type": "experience",
+            "source_id": f"experience_{i}_0",
+            "text": " ".join(random.choices(WORDS, k=60)),
+            "created_at": created_at - timedelta(minutes=i),
+            "score": 1.0 - i / (top_k * 2),
+        }
+        for i in range(top_k)
+    ]
+
+def _fastapi_response(adapter: TypeAdapter, value: Any) -> bytes:
+    """What FastAPI does with a response_model: validate, serialize to JSON-able data, then json.dumps."""
+    validated = adapter.validate_python(value, from_attributes=True)
+    return json.dumps(jsonable_encoder(adapter.dump_python(validated, mode="json"))).encode("utf-8")
+
+def _cpu_us(func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations * 1e6
+
+def main(args: argparse.Namespace) -> None:
+    results = _search_results(args.top_k)
+    embedding_adapter = TypeAdapter(embedding_schemas.RetrieveResponse)
+    retrieval_adapter = TypeAdapter(retrieval_schemas.RetrieveResponse)
+
+    def embedding_before() -> bytes:
+        chunks = [embedding_schemas.ChunkItem(**res) for res in results]
+        return _fastapi_response(embedding_adapter, embedding_schemas.RetrieveResponse(results=chunks))
+
+    def embedding_after() -> bytes:
+        return serialization.dumps({"results": [serialization.chunk_payload(res) for res in results]})
+
+    body = embedding_before()
+
+    def retrieval_before() -> bytes:
+        chunks = [retrieval_schemas.ChunkItem(**item) for item in json.loads(body)["results"]]
+        return _fastapi_response(retrieval_adapter, retrieval_schemas.RetrieveResponse(results=chunks))
+
+    def retrieval_after() -> bytes:
+        return serialization.RawJSONResponse(body).body
+
+    def generator_before() -> list:
+        return [generator_schemas.ChunkItem(**item) for item in json.loads(body).get("results", [])]
+
+    def generator_after() -> list:
+        return generator_schemas.RetrieveResponse.model_validate_json(body).results
+
+    hops = [
+        ("embedding", embedding_before, embedding_after),
+        ("retrieval", retrieval_before, retrieval_after),
+        ("generator", generator_before, generator_after),
+    ]
+    encoder = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+    print(f"top_k={args.top_k}, {len(body)} byte payload, encoder: {encoder}")
+    print(f"{'hop':>10} {'before us':>12} {'after us':>12} {'speedup':>9}")
+    total_before = total_after = 0.0
+    for name, before, after in hops:
+        before_us = _cpu_us(before, args.iterations)
+        after_us = _cpu_us(after, args.iterations)
+        total_before += before_us
+        total_after += after_us
+        print(f"{name:>10} {before_us:>12.1f} {after_us:>12.1f} {before_us / after_us:>8.1f}x")
+    print(f"{'total':>10} {total_before:>12.1f} {total_after:>12.1f} {total_before / total_after:>8.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    main(parser.parse_args())
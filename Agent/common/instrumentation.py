@@ -0,0 +1,156 @@
+# common/instrumentation.py
+"""
+Latency histograms shared by every service, exposed in the Prometheus text format.
+
+    instrument_app(app, "retrieval")               # per-route histogram and GET /metrics
+    async with track("embedding_service", "embed"):  # one downstream call
+        ...
+    with track("mongo", "find_chunks"):
+        ...
+
+All histograms carry a `service` label, so one Prometheus job can scrape every
+service and a request's time can be followed hop by hop.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Spans cache hits (milliseconds) up to the orchestrator's 90 s budget.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 90.0)
+
+class Histogram:
+    """A cumulative Prometheus histogram keyed by label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], seconds: float) -> None:
+        with self._lock:
+            # Per-bucket counts, then sum and count.
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound:g}"}} {cumulative:g}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series[-1]:g}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {series[-1]:g}")
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latency of requests served, by route template.",
+    ("service", "method", "route", "status")
+)
+DOWNSTREAM_LATENCY = Histogram(
+    "downstream_call_duration_seconds", "Latency of calls to dependencies (services, Mongo, Redis, LLM, model).",
+    ("service", "target", "operation", "outcome")
+)
+
+_service_name = "unknown"
+
+def observe_downstream(target: str, operation: str, seconds: float, outcome: str = "ok") -> None:
+    """Records one downstream call; for callers that cannot wrap the call in `track`, such as callbacks."""
+    DOWNSTREAM_LATENCY.observe((_service_name, target, operation, outcome), seconds)
+
+class track:
+    """
+    Times one downstream call into DOWNSTREAM_LATENCY. Works with `with` and
+    `async with`; the outcome label is "error" when the block raises.
+    """
+
+    def __init__(self, target: str, operation: str):
+        self.target = target
+        self.operation = operation
+        self._started = 0.0
+
+    def __enter__(self) -> "track":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        outcome = "ok" if exc_type is None else "error"
+        observe_downstream(self.target, self.operation, time.perf_counter() - self._started, outcome)
+
+    async def __aenter__(self) -> "track":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+def timed(target: str, operation: Optional[str] = None) -> Callable:
+    """Decorator form of `track` for sync and async functions; the operation defaults to the function name."""
+    def decorator(func: Callable) -> Callable:
+        name = operation or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with track(target, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track(target, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def render_metrics() -> str:
+    return "\n".join(REQUEST_LATENCY.render() + DOWNSTREAM_LATENCY.render()) + "\n"
+
+def instrument_app(app: FastAPI, service: str) -> None:
+    """Records the latency of every request by route template and serves GET /metrics."""
+    global _service_name
+    _service_name = service
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # Route templates ("/retrieve/{user_id}") keep label cardinality bounded.
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(
+                (service, request.method, route_path, str(status_code)), time.perf_counter() - started
+            )
+
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,84 @@
+# common/model_backends.py
+
+import os
+import logging
+from typing import Literal, Tuple
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+InferenceBackend = Literal['torch', 'onnx', 'onnx-int8']
+
+ONNX_FILE = "onnx/model.onnx"
+ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+PARITY_PROBES = [
+    "Senior backend engineer with 6 years of Python, FastAPI and PostgreSQL experience.",
+    "Built Kubernetes deployment pipelines on AWS and cut release time by 40%.",
+    "B.Sc. in Computer Science, University of Toronto",
+    "Machine learning, NLP, sentence embeddings, vector search",
+]
+
+def _export_dir(model_name: str, export_root: str) -> str:
+    return os.path.join(export_root, model_name.replace("/", "__"))
+
+def _load_onnx(model_name: str, export_root: str, quantized: bool, device: str) -> SentenceTransformer:
+    """Exports the model to ONNX (and optionally dynamic int8) once, then loads it from the export directory."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = _export_dir(model_name, export_root)
+    if not os.path.exists(os.path.join(export_dir, ONNX_FILE)):
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        SentenceTransformer(model_name, backend="onnx", device=device).save_pretrained(export_dir)
+
+    file_name = ONNX_FILE
+    if quantized:
+        file_name = ONNX_INT8_FILE
+        if not os.path.exists(os.path.join(export_dir, ONNX_INT8_FILE)):
+            logger.info(f"Quantizing {model_name} ONNX export to dynamic int8")
+            onnx_model = SentenceTransformer(export_dir, backend="onnx", device=device)
+            export_dynamic_quantized_onnx_model(onnx_model, "avx512_vnni", export_dir)
+    return SentenceTransformer(export_dir, backend="onnx", device=device, model_kwargs={"file_name": file_name})
+
+def parity_score(candidate: SentenceTransformer, reference: SentenceTransformer) -> float:
+    """Lowest cosine similarity between the two models' embeddings of the probe sentences."""
+    a = candidate.encode(PARITY_PROBES, convert_to_numpy=True, normalize_embeddings=True)
+    b = reference.encode(PARITY_PROBES, convert_to_numpy=True, normalize_embeddings=True)
+    return float(np.min(np.sum(a * b, axis=1)))
+
+def load_sentence_transformer(
+    model_name: str,
+    backend: InferenceBackend = 'torch',
+    device: str = "cpu",
+    export_root: str = "onnx_models",
+    min_parity: float = 0.99,
+    verify_parity: bool = True
+) -> Tuple[SentenceTransformer, InferenceBackend]:
+    """
+    Loads `model_name` with the requested inference backend and returns the
+    model together with the backend it actually runs on.
+
+    ONNX backends are checked against the PyTorch model on a fixed set of probe
+    sentences; if the worst-case cosine similarity falls below `min_parity` the
+    PyTorch model is used instead, so a bad export can never silently change scores.
+    """
+    if backend == 'torch':
+        return SentenceTransformer(model_name, device=device), 'torch'
+    if backend not in ('onnx', 'onnx-int8'):
+        raise ValueError(f"Unknown inference backend '{backend}'")
+
+    candidate = _load_onnx(model_name, export_root, quantized=(backend == 'onnx-int8'), device=device)
+    if not verify_parity:
+        return candidate, backend
+
+    reference = SentenceTransformer(model_name, device=device)
+    parity = parity_score(candidate, reference)
+    if parity < min_parity:
+        logger.warning(
+            f"{backend} backend for {model_name} failed parity check "
+            f"(min cosine {parity:.4f} < {min_parity}); falling back to torch"
+        )
+        return reference, 'torch'
+    logger.info(f"{backend} backend for {model_name} passed parity check (min cosine {parity:.4f})")
+    return candidate, backend
@@ -0,0 +1,57 @@
+# common/serialization.py
+"""
+Fast JSON path for chunk payloads passed between the services.
+
+Search results are encoded straight from dicts with orjson (stdlib json when it
+is not installed) instead of being validated into pydantic models and dumped
+again, and intermediate hops forward the downstream response bytes unchanged.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_FIELDS = ("user_id", "index_namespace", "section_id", "source_type", "source_id", "text")
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def chunk_payload(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps a search result document to the ChunkItem wire format."""
+    payload = {"chunk_id": str(document["_id"] if "_id" in document else document["chunk_id"])}
+    for field in CHUNK_FIELDS:
+        payload[field] = document.get(field)
+    payload["score"] = float(document["score"])
+    payload["created_at"] = document.get("created_at")
+    return payload
+
+class RawJSONResponse(Response):
+    """A JSON response whose body is already encoded bytes, or any value `dumps` can encode."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content)
@@ -1,27 +1,50 @@
 # embedding/app.py
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
+import asyncio
 import httpx
 from datetime import datetime
+from typing import Dict, Optional
 import traceback
 from dotenv import load_dotenv
 load_dotenv()
-from . import services, db, model, config, schemas
+from . import services, db, model, config, schemas, bulk_index
+from .background_indexer import BackgroundIndexer
+from .vector_codec import encode_vectors, vectors_to_bytes
+from common.serialization import RawJSONResponse, chunk_payload
+from common.instrumentation import instrument_app
+
+OCTET_STREAM = "application/octet-stream"
 
 http_client: httpx.AsyncClient
+_bulk_index_tasks: Dict[str, asyncio.Task] = {}
+background_indexer: Optional[BackgroundIndexer] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global http_client
+    global http_client, background_indexer
     print(f"Starting up {config.APP_NAME} v{config.APP_VERSION}...")
     db.init_db()
     model.load_model()
+    model.start_scheduler()
     http_client = httpx.AsyncClient()
+    if config.BACKGROUND_INDEXER_ENABLED:
+        background_indexer = BackgroundIndexer(
+            debounce_seconds=config.INDEXER_DEBOUNCE_SECONDS,
+            concurrency=config.INDEXER_CONCURRENCY,
+            use_change_stream=config.INDEXER_USE_CHANGE_STREAM
+        )
+        background_indexer.start()
     print("Startup complete. Service is ready.")
     yield
     print("Shutting down...")
     await http_client.aclose()
+    if background_indexer is not None:
+        await background_indexer.stop()
+    await model.stop_scheduler()
+    db.close_db()
     print("Shutdown complete.")
 
 app = FastAPI(
@@ -29,6 +52,7 @@ app = FastAPI(
     version=config.APP_VERSION,
     lifespan=lifespan
 )
+instrument_app(app, "embedding")
 
 @app.post(
     "/index/profile/{user_id}", response_model=schemas.IndexProfileResponse, tags=["Indexing"]
@@ -36,41 +60,79 @@ app = FastAPI(
 async def index_user_profile(user_id: str):
     """Manually triggers indexing for a user. The /retrieve endpoint now does this automatically if needed."""
     try:
-        total_chunks = await services.index_profile_from_db(user_id)
-        return {"status": "success", "message": f"Profile indexed successfully into {total_chunks} chunks."}
+        stats = await services.index_profile_single_flight(user_id)
+        return {
+            "status": "success",
+            "message": (
+                f"Profile indexed successfully: {stats['chunks']} chunks written for "
+                f"{stats['fields_changed']} changed fields, {stats['fields_removed']} fields removed."
+            ),
+            **stats
+        }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         tb_str = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"Error during indexing: {e}\n{tb_str}")
 
-@app.post("/retrieve/{user_id}", response_model=schemas.RetrieveResponse, tags=["Retrieval"])
-async def retrieve_similar_chunks(user_id: str, request: schemas.RetrieveRequest):
-    """
-    Retrieves chunks for a user. If the user has not been indexed yet,
-    this endpoint will autonomously trigger the indexing process first.
-    """
+@app.post("/events/profile-changed/{user_id}", status_code=202, tags=["Indexing"])
+async def profile_changed(user_id: str):
+    """Queues a debounced background reindex; for writers of the profiles collection without change streams."""
+    if background_indexer is None:
+        raise HTTPException(status_code=503, detail="Background indexer is disabled.")
+    background_indexer.notify(user_id)
+    return {"status": "queued", "user_id": user_id}
+
+@app.post("/admin/index/bulk", response_model=schemas.BulkIndexJobResponse, tags=["Admin"])
+async def start_bulk_index(request: schemas.BulkIndexRequest):
+    """Starts (or resumes) a background job that reindexes every profile. Poll its progress by job_id."""
+    if request.job_id in _bulk_index_tasks:
+        raise HTTPException(status_code=409, detail=f"Bulk indexing job '{request.job_id}' is already running.")
     try:
-        last_indexed = db.get_user_index_status(user_id)
-        
-        if not last_indexed:
-            print(f"User '{user_id}' not indexed. Triggering autonomous indexing...")
-            try:
-                await services.index_profile_from_db(user_id)
+        job = await db.run_async(bulk_index.prepare_job, request.job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting bulk indexing: {e}")
+    job_id = job["_id"]
+    task = asyncio.create_task(asyncio.to_thread(
+        bulk_index.run_bulk_index, job, batch_size=request.batch_size, workers=request.workers
+    ))
+    _bulk_index_tasks[job_id] = task
+    task.add_done_callback(lambda _: _bulk_index_tasks.pop(job_id, None))
+    return schemas.BulkIndexJobResponse(**job)
+
+@app.get("/admin/index/bulk/{job_id}", response_model=schemas.BulkIndexJobResponse, tags=["Admin"])
+async def get_bulk_index_job(job_id: str):
+    job = await db.run_async(db.get_index_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Bulk indexing job '{job_id}' not found.")
+    return schemas.BulkIndexJobResponse(**job)
+
+async def _retrieve(
+    user_id: str, query_vector, query_text: Optional[str], options: schemas.RetrieveOptions
+) -> RawJSONResponse:
+    """Indexes the user on first use, then runs the search described by `options`."""
+    try:
+        try:
+            if await services.ensure_user_indexed(user_id):
                 print(f"Autonomous indexing for user '{user_id}' complete.")
-            except ValueError as e:
-                raise HTTPException(status_code=404, detail=f"Profile for user_id '{user_id}' not found in database for indexing.")
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=f"Profile for user_id '{user_id}' not found in database for indexing.")
 
-        search_results = db.search_chunks_vector(
+        search_results = await db.run_async(
+            db.search_chunks,
             user_id=user_id,
-            namespace=request.index_namespace,
-            query_vector=request.query_embedding,
-            top_k=request.top_k,
-            filter_by_section_ids=request.filter_by_section_ids
+            namespace=options.index_namespace,
+            query_vector=query_vector,
+            top_k=options.top_k,
+            filter_by_section_ids=options.filter_by_section_ids,
+            search_mode=options.search_mode,
+            query_text=query_text,
+            rrf_k=options.rrf_k,
+            diversity=options.diversity
         )
-        
-        results = [schemas.ChunkItem(**res) for res in search_results]
-        return schemas.RetrieveResponse(results=results)
+
+        # Encoded straight from the search dicts; the RetrieveResponse model only documents the shape.
+        return RawJSONResponse({"results": [chunk_payload(res) for res in search_results]})
 
     except HTTPException:
         raise
@@ -78,6 +140,26 @@ async def retrieve_similar_chunks(user_id: str, request: schemas.RetrieveRequest
         tb_str = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"An internal error occurred during retrieval: {e}\n{tb_str}")
 
+@app.post("/retrieve/{user_id}", response_model=schemas.RetrieveResponse, tags=["Retrieval"])
+async def retrieve_similar_chunks(user_id: str, request: schemas.RetrieveRequest):
+    """
+    Retrieves chunks for a user. If the user has not been indexed yet,
+    this endpoint will autonomously trigger the indexing process first.
+    """
+    return await _retrieve(user_id, request.query_vector(), request.query_text, request)
+
+@app.post("/retrieve/{user_id}/text", response_model=schemas.RetrieveResponse, tags=["Retrieval"])
+async def retrieve_chunks_by_text(user_id: str, request: schemas.RetrieveByTextRequest):
+    """
+    Embeds the query text and retrieves chunks in one call, saving clients the
+    separate /embed round trip and the vector payload.
+    """
+    try:
+        query_vector = await model.embed_text_async(request.query_text)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating embedding: {e}")
+    return await _retrieve(user_id, query_vector, request.query_text, request)
+
 @app.post(
     "/index/{user_id}/section", response_model=schemas.IndexSectionResponse, tags=["Indexing"]
 )
@@ -101,7 +183,7 @@ async def index_resume_section(user_id: str, request: schemas.IndexSectionReques
 )
 async def delete_resume_section(user_id: str, section_id: str):
     try:
-        deleted_count = db.delete_chunks_by_section_id(user_id, section_id)
+        deleted_count = await db.run_async(db.delete_chunks_by_section_id, user_id, section_id)
         return schemas.DeleteSectionResponse(
             status=f"Deleted {deleted_count} chunks for section {section_id}.",
             section_id=section_id,
@@ -110,13 +192,54 @@ async def delete_resume_section(user_id: str, section_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting section: {e}")
 
 @app.post("/embed", response_model=schemas.EmbedResponse, tags=["Utilities"])
-async def embed_text_endpoint(request: schemas.EmbedRequest):
+async def embed_text_endpoint(request: schemas.EmbedRequest, http_request: Request):
+    """
+    Embeds one text. Send `Accept: application/octet-stream` to receive the raw
+    little-endian float32 bytes, or set `encoding` for a base64 payload.
+    """
     try:
-        embedding_vector = model.embed_text(request.text)
-        return schemas.EmbedResponse(embedding=embedding_vector.tolist())
+        embedding_vector = await model.embed_text_async(request.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating embedding: {e}")
+    if OCTET_STREAM in http_request.headers.get("accept", ""):
+        return Response(content=vectors_to_bytes(embedding_vector), media_type=OCTET_STREAM)
+    if request.encoding == 'json':
+        return schemas.EmbedResponse(embedding=embedding_vector.tolist())
+    return schemas.EmbedResponse(
+        embedding_b64=encode_vectors(embedding_vector, request.encoding), encoding=request.encoding
+    )
+
+@app.post("/embed/batch", response_model=schemas.EmbedBatchResponse, tags=["Utilities"])
+async def embed_batch_endpoint(request: schemas.EmbedBatchRequest, http_request: Request):
+    """Embeds many texts in one call. Vectors are returned in request order."""
+    if any(not text for text in request.texts):
+        raise HTTPException(status_code=422, detail="Texts must be non-empty strings.")
+    try:
+        embeddings = await model.embed_text_async(request.texts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating embeddings: {e}")
+    if OCTET_STREAM in http_request.headers.get("accept", ""):
+        return Response(
+            content=vectors_to_bytes(embeddings), media_type=OCTET_STREAM,
+            headers={"X-Vector-Count": str(len(request.texts)), "X-Vector-Dim": str(config.EMBEDDING_DIM)}
+        )
+    if request.encoding == 'json':
+        return schemas.EmbedBatchResponse(embeddings=embeddings.tolist(), count=len(request.texts))
+    return schemas.EmbedBatchResponse(
+        embeddings_b64=encode_vectors(embeddings, request.encoding),
+        encoding=request.encoding,
+        count=len(request.texts)
+    )
 
 @app.get("/health", tags=["Utilities"])
 async def health_check():
-    return {"status": "healthy", "service": config.APP_NAME, "backend": "mongodb"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "service": config.APP_NAME,
+        "backend": "mongodb",
+        "vector_search": config.VECTOR_SEARCH_BACKEND,
+        "embedding_cache": model.get_cache_stats(),
+        "retrieval_cache": db.get_result_cache_stats(),
+        "inference": model.get_inference_stats(),
+        "background_indexer": background_indexer.stats() if background_indexer is not None else None
+    }
\ No newline at end of file
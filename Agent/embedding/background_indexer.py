@@ -0,0 +1,133 @@
+# embedding/background_indexer.py
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+from . import db, services
+
+logger = logging.getLogger(__name__)
+
+class BackgroundIndexer:
+    """
+    Reindexes profiles in the background when they change.
+
+    Change events come from a MongoDB change stream on the profiles collection
+    (when the deployment supports it) and from `notify()`, which is the local
+    queue used by the /events endpoint and in-process callers. Events are
+    debounced per user, so a burst of edits leads to one reindex once the user
+    has been quiet for `debounce_seconds`. Indexing runs through
+    `services.index_profile_single_flight`, so it shares work with /retrieve.
+    """
+
+    def __init__(self, debounce_seconds: float = 2.0, concurrency: int = 2, use_change_stream: bool = True):
+        self.debounce_seconds = debounce_seconds
+        self.use_change_stream = use_change_stream
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._due: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._watcher: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.change_stream_active = False
+        self.events = 0
+        self.indexed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping.clear()
+        self._worker = self._loop.create_task(self._run())
+        if self.use_change_stream:
+            self._watcher = threading.Thread(target=self._watch_profiles, name="profile-change-stream", daemon=True)
+            self._watcher.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._watcher is not None:
+            await asyncio.to_thread(self._watcher.join, 5)
+            self._watcher = None
+
+    def notify(self, user_id: str) -> None:
+        """Records that a user's profile changed; must be called from the event loop thread."""
+        self.events += 1
+        self._due[user_id] = self._loop.time() + self.debounce_seconds
+        self._wakeup.set()
+
+    def notify_threadsafe(self, user_id: str) -> None:
+        self._loop.call_soon_threadsafe(self.notify, user_id)
+
+    def stats(self) -> dict:
+        return {
+            "change_stream_active": self.change_stream_active,
+            "events": self.events,
+            "pending": len(self._due),
+            "in_progress": len(self._running),
+            "indexed": self.indexed,
+            "failed": self.failed,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            now = self._loop.time()
+            for user_id in [user_id for user_id, due in self._due.items() if due <= now]:
+                del self._due[user_id]
+                task = self._loop.create_task(self._index(user_id))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            timeout = min(self._due.values()) - now if self._due else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _index(self, user_id: str) -> None:
+        async with self._semaphore:
+            try:
+                stats = await services.index_profile_single_flight(user_id)
+                self.indexed += 1
+                logger.info(
+                    f"Background reindex of '{user_id}': {stats['fields_changed']} fields changed, "
+                    f"{stats['fields_removed']} removed"
+                )
+            except ValueError as e:
+                self.failed += 1
+                logger.warning(f"Background reindex of '{user_id}' skipped: {e}")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Background reindex of '{user_id}' failed: {e}")
+
+    def _watch_profiles(self) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        try:
+            with db.get_profiles_collection().watch(
+                pipeline, full_document="updateLookup", max_await_time_ms=1000
+            ) as stream:
+                self.change_stream_active = True
+                logger.info("Watching the profiles collection for changes")
+                while not self._stopping.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change is None:
+                        continue
+                    user_id = (change.get("fullDocument") or {}).get("user_id")
+                    if user_id:
+                        self.notify_threadsafe(user_id)
+        except Exception as e:
+            logger.warning(f"Profile change stream unavailable, relying on /events notifications: {e}")
+        finally:
+            self.change_stream_active = False
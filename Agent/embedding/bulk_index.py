@@ -0,0 +1,147 @@
+# embedding/bulk_index.py
+"""
+Bulk (re)indexing of every profile in the profiles collection.
+
+Profile ids are streamed in user_id order. Batches of profiles are chunked and
+encoded in a process pool, then written with one bulk write per batch. After
+each batch, the last committed user_id is saved as a checkpoint in the
+index_jobs collection, so an interrupted job can be resumed with its id.
+
+    python -m embedding.bulk_index --batch-size 64 --workers 4
+    python -m embedding.bulk_index --job-id <id>      # resume
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Callable, Deque
+
+import numpy as np
+from dotenv import load_dotenv
+load_dotenv()
+
+from . import db, chunking, model, config, services
+
+logger = logging.getLogger(__name__)
+
+MAX_RECORDED_FAILURES = 100
+
+def _init_worker(model_name: str, backend: str, torch_threads: int) -> None:
+    import torch
+    torch.set_num_threads(torch_threads)
+    model.load_model(model_name, backend=backend)
+
+def _prepare_profiles(profiles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Runs in a worker process: chunks and encodes a batch of profiles."""
+    pending_chunks = []
+    for profile in profiles:
+        text_fields = chunking.extract_text_fields(profile)
+        pending_chunks.extend(
+            services.build_pending_chunks(profile["user_id"], "profile", text_fields, fingerprint_fields=True)
+        )
+    if not pending_chunks:
+        return [], np.empty((0, config.EMBEDDING_DIM), dtype=np.float32)
+    return pending_chunks, model.embed_text([chunk["text"] for chunk in pending_chunks])
+
+def prepare_job(job_id: Optional[str] = None) -> Dict[str, Any]:
+    """Loads the job to resume, or creates a new one, and records how many profiles remain."""
+    job = db.get_index_job(job_id) if job_id else None
+    if job is None:
+        job = {
+            "_id": job_id or uuid.uuid4().hex,
+            "last_user_id": None,
+            "processed_users": 0,
+            "failed_users": 0,
+            "failed_user_ids": [],
+            "chunks_written": 0,
+            "started_at": datetime.now(timezone.utc),
+        }
+    job.update({"status": "running", "users_per_sec": 0.0, "eta_seconds": None})
+    job["total_users"] = job["processed_users"] + job["failed_users"] + db.count_profiles(job["last_user_id"])
+    db.save_index_job(job)
+    return job
+
+def run_bulk_index(
+    job: Dict[str, Any],
+    batch_size: int = 64,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """Indexes every profile after the job's checkpoint. Returns the final job document."""
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    started = time.perf_counter()
+    done_at_start = job["processed_users"] + job["failed_users"]
+
+    def commit(user_ids: List[str], future: Future) -> None:
+        try:
+            pending_chunks, embeddings = future.result()
+            job["chunks_written"] += db.replace_users_chunks(user_ids, "profile", pending_chunks, embeddings)
+            db.mark_users_indexed(user_ids)
+            job["processed_users"] += len(user_ids)
+        except Exception as e:
+            logger.error(f"Bulk indexing failed for users {user_ids[0]}..{user_ids[-1]}: {e}")
+            job["failed_users"] += len(user_ids)
+            job["failed_user_ids"] = (job["failed_user_ids"] + user_ids)[:MAX_RECORDED_FAILURES]
+
+        job["last_user_id"] = user_ids[-1]
+        done = job["processed_users"] + job["failed_users"]
+        rate = (done - done_at_start) / (time.perf_counter() - started)
+        job["users_per_sec"] = round(rate, 2)
+        job["eta_seconds"] = round(max(job["total_users"] - done, 0) / rate, 1) if rate > 0 else None
+        db.save_index_job(job)
+        if progress is not None:
+            progress(job)
+
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(config.MODEL_NAME, config.INFERENCE_BACKEND, torch_threads)
+        ) as pool:
+            # Batches are committed in submission order so the checkpoint only ever moves forward.
+            in_flight: Deque[Tuple[List[str], Future]] = deque()
+            for user_ids in db.iter_profile_user_id_batches(job["last_user_id"], batch_size):
+                profiles = db.get_profiles_by_ids(user_ids)
+                in_flight.append((user_ids, pool.submit(_prepare_profiles, profiles)))
+                if len(in_flight) >= workers * 2:
+                    commit(*in_flight.popleft())
+            while in_flight:
+                commit(*in_flight.popleft())
+        job["status"] = "completed"
+    except Exception as e:
+        logger.error(f"Bulk indexing job {job['_id']} stopped: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    job["eta_seconds"] = None
+    db.save_index_job(job)
+    return job
+
+def _print_progress(job: Dict[str, Any]) -> None:
+    eta = f"{job['eta_seconds']:.0f}s" if job["eta_seconds"] is not None else "?"
+    print(
+        f"[{job['_id']}] {job['processed_users'] + job['failed_users']}/{job['total_users']} users "
+        f"({job['failed_users']} failed), {job['chunks_written']} chunks, "
+        f"{job['users_per_sec']:.1f} users/s, ETA {eta}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--job-id", default=None, help="Resume this job from its checkpoint (or name a new job)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Profiles per worker task and bulk write")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: half the CPUs)")
+    args = parser.parse_args()
+    db.init_db()
+    job = prepare_job(args.job_id)
+    print(f"Job {job['_id']}: {job['total_users']} profiles, resuming after {job['last_user_id']!r}")
+    job = run_bulk_index(job, batch_size=args.batch_size, workers=args.workers, progress=_print_progress)
+    print(f"Job {job['_id']} {job['status']}: {job['processed_users']} indexed, {job['failed_users']} failed.")
+    db.close_db()
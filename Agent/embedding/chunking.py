@@ -1,76 +1,127 @@
-import nltk
+import re
 import logging
-from typing import List, Tuple
+from typing import List, Tuple, Iterator, Callable, Optional, Sequence
+
+from . import config
 
 logger = logging.getLogger(__name__)
 
-def _download_nltk_data():
-    required_data = ["punkt", "punkt_tab"]
-    
-    for data in required_data:
-        try:
-            nltk.data.find(f"tokenizers/{data}")
-            logger.info(f"NLTK {data} tokenizer found")
-        except LookupError:
-            logger.info(f"Downloading NLTK {data} tokenizer...")
-            try:
-                nltk.download(data, quiet=True)
-                logger.info(f"Successfully downloaded NLTK {data} tokenizer")
-            except Exception as e:
-                logger.error(f"Failed to download NLTK {data} tokenizer: {e}")
-                try:
-                    import ssl
-                    import urllib.request
-                    import shutil
-                    
-                    nltk_dir = os.path.join(os.path.expanduser('~'), 'nltk_data')
-                    os.makedirs(nltk_dir, exist_ok=True)
-                    
-                    url = f"https://raw.githubusercontent.com/nltk/nltk_data/gh-pages/packages/tokenizers/{data}.zip"
-                    target_path = os.path.join(nltk_dir, f"{data}.zip")
-                    
-                    ssl._create_default_https_context = ssl._create_unverified_context
-                    
-                    with urllib.request.urlopen(url) as response, open(target_path, 'wb') as out_file:
-                        shutil.copyfileobj(response, out_file)
-                    
-                    import zipfile
-                    with zipfile.ZipFile(target_path, 'r') as zip_ref:
-                        zip_ref.extractall(nltk_dir)
-                    
-                    logger.info(f"Successfully downloaded and extracted {data} from GitHub")
-                except Exception as e2:
-                    logger.error(f"Alternative download method also failed: {e2}")
-                    raise
-
-_download_nltk_data()
-
-def chunk_text(text: str, max_words: int = 150) -> List[str]:
+# Bump when the splitting rules change so fingerprinted profile fields are re-chunked.
+CHUNKER_VERSION = "2"
+
+# A sentence ends at terminal punctuation (plus closing quotes/brackets) followed by
+# whitespace and something that looks like the start of a new sentence.
+_SENTENCE_BOUNDARY = re.compile(r'([.!?]+["\')\]]*)\s+(?=["\'(\[]?[A-Z0-9])')
+_ABBREVIATION = re.compile(
+    r'(?:\b(?i:e\.g|i\.e|etc|vs|approx|incl|mr|mrs|ms|dr|prof|sr|jr|inc|ltd|co|corp|st|no|'
+    r'jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)|\b[A-Z])\.$'
+)
+_BASIC_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+TokenCounter = Callable[[Sequence[str]], List[int]]
+
+def _approximate_token_counts(texts: Sequence[str]) -> List[int]:
+    """Counts word and punctuation tokens; a lower bound on WordPiece tokens used until a tokenizer is set."""
+    return [len(_BASIC_TOKEN.findall(text)) for text in texts]
+
+_count_tokens: TokenCounter = _approximate_token_counts
+
+def set_tokenizer(tokenizer) -> None:
+    """Sizes chunks with the embedding model's own tokenizer (a Hugging Face tokenizer)."""
+    global _count_tokens
+
+    def count_tokens(texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    _count_tokens = count_tokens
+
+def fingerprint_salt() -> str:
+    """Identifies the chunking rules and budgets; changes whenever they would produce different chunks."""
+    return f"chunker-v{CHUNKER_VERSION}:{config.CHUNK_MAX_TOKENS}:{config.CHUNK_OVERLAP_TOKENS}"
+
+def split_sentences(text: str) -> Iterator[str]:
+    """Splits text into sentences with precompiled rules; line breaks always end a sentence."""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(line):
+            candidate = line[start:match.end(1)]
+            if _ABBREVIATION.search(candidate):
+                continue
+            yield candidate.strip()
+            start = match.end()
+        tail = line[start:].strip()
+        if tail:
+            yield tail
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[Tuple[str, int]]:
+    """Breaks a sentence that exceeds the budget on word boundaries."""
+    words = sentence.split()
+    counts = _count_tokens(words)
+    pieces = []
+    current: List[str] = []
+    current_tokens = 0
+    for word, tokens in zip(words, counts):
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append((' '.join(current), current_tokens))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append((' '.join(current), current_tokens))
+    return pieces
+
+def iter_chunks(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Yields chunks of whole sentences whose token count fits `max_tokens`.
+
+    With `overlap_tokens`, each chunk starts with as many trailing sentences of the
+    previous chunk as fit in that many tokens.
+    """
     if not text or not text.strip():
-        return []
-
-    try:
-        sentences = nltk.sent_tokenize(text)
-    except LookupError:
-        _download_nltk_data()
-        sentences = nltk.sent_tokenize(text)
-        
-    chunks = []
-    current_chunk = []
-    current_word_count = 0
-
-    for sentence in sentences:
-        words = len(sentence.split())
-        if current_word_count + words > max_words and current_chunk:
-            chunks.append(' '.join(current_chunk))
-            current_chunk = [sentence]
-            current_word_count = words
+        return
+    max_tokens = max_tokens or config.CHUNK_MAX_TOKENS
+    overlap_tokens = config.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+
+    sentences = list(split_sentences(text))
+    units: List[Tuple[str, int]] = []
+    for sentence, tokens in zip(sentences, _count_tokens(sentences)):
+        if tokens > max_tokens:
+            units.extend(_split_long_sentence(sentence, max_tokens))
         else:
-            current_chunk.append(sentence)
-            current_word_count += words
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    return chunks
+            units.append((sentence, tokens))
+
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    fresh = 0
+    for sentence, tokens in units:
+        if current and current_tokens + tokens > max_tokens and fresh:
+            yield ' '.join(unit for unit, _ in current)
+            carried: List[Tuple[str, int]] = []
+            carried_tokens = 0
+            for unit in reversed(current):
+                if carried_tokens + unit[1] > overlap_tokens or carried_tokens + unit[1] + tokens > max_tokens:
+                    break
+                carried.insert(0, unit)
+                carried_tokens += unit[1]
+            current, current_tokens, fresh = carried, carried_tokens, 0
+        current.append((sentence, tokens))
+        current_tokens += tokens
+        fresh += 1
+    if current and fresh:
+        yield ' '.join(unit for unit, _ in current)
+
+def chunk_text(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[str]:
+    return list(iter_chunks(text, max_tokens, overlap_tokens))
 
 def extract_text_fields(profile_data: dict) -> List[Tuple[str, str, str]]:
     text_fields = []
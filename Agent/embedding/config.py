@@ -9,6 +9,54 @@ MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("MONGO_URI environment variable not set.")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "test")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+# Blocking pymongo calls run on a dedicated thread pool of this size, off the event loop.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "16"))
 
 MODEL_NAME = "all-MiniLM-L6-v2"
-EMBEDDING_DIM = 384
\ No newline at end of file
+EMBEDDING_DIM = 384
+
+# "atlas" uses MongoDB Atlas $vectorSearch; "memory" searches in-process NumPy matrices.
+VECTOR_SEARCH_BACKEND = os.getenv("VECTOR_SEARCH_BACKEND", "atlas").lower()
+VECTOR_ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", "5000"))
+VECTOR_ANN_EF = int(os.getenv("VECTOR_ANN_EF", "64"))
+# (user, namespace) partitions kept in memory by the vector and BM25 indexes; least recently used are evicted.
+VECTOR_INDEX_MAX_PARTITIONS = int(os.getenv("VECTOR_INDEX_MAX_PARTITIONS", "1024"))
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PERSISTENT = os.getenv("EMBEDDING_CACHE_PERSISTENT", "false").lower() == "true"
+
+# Concurrent encode requests are coalesced for up to this window or until the batch is full.
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))
+
+# How chunk vectors are stored: "float32" (BSON binary vector), "int8" (scalar-quantized) or "array" (legacy list of doubles).
+EMBEDDING_STORAGE_FORMAT = os.getenv("EMBEDDING_STORAGE_FORMAT", "float32").lower()
+
+# "torch", "onnx" or "onnx-int8" (dynamic int8 quantization). ONNX exports are cached under ONNX_EXPORT_DIR.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", "onnx_models")
+ONNX_MIN_PARITY = float(os.getenv("ONNX_MIN_PARITY", "0.99"))
+
+# How long a positive "user is indexed" lookup is served from memory before re-reading Mongo.
+INDEX_STATUS_TTL_SECONDS = float(os.getenv("INDEX_STATUS_TTL_SECONDS", "30"))
+
+# Chunk budget in model tokens; all-MiniLM-L6-v2 reads at most 256 tokens including [CLS] and [SEP].
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "254"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+
+# Background reindexing of changed profiles (Mongo change streams need a replica set; /events always works).
+BACKGROUND_INDEXER_ENABLED = os.getenv("BACKGROUND_INDEXER_ENABLED", "true").lower() == "true"
+INDEXER_USE_CHANGE_STREAM = os.getenv("INDEXER_USE_CHANGE_STREAM", "true").lower() == "true"
+INDEXER_DEBOUNCE_SECONDS = float(os.getenv("INDEXER_DEBOUNCE_SECONDS", "2"))
+INDEXER_CONCURRENCY = int(os.getenv("INDEXER_CONCURRENCY", "2"))
+
+# Hybrid retrieval fetches top_k * this many candidates from each ranker before fusing them.
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "4"))
+
+# Retrieval results kept per (user, namespace, query, top_k, sections); entries are scoped by a
+# per-user index version that every chunk write bumps. 0 disables the cache.
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "2048"))
+
+# MMR diversity reranking fetches top_k * this many candidates before selecting a diverse top_k.
+MMR_CANDIDATE_MULTIPLIER = int(os.getenv("MMR_CANDIDATE_MULTIPLIER", "4"))
@@ -1,21 +1,93 @@
 # embedding/db.py
 
-from pymongo import MongoClient
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, ReplaceOne, UpdateOne, ASCENDING
 from pymongo.collection import Collection
-from typing import List, Optional, Dict, Any
+from pymongo.errors import OperationFailure
+from typing import List, Optional, Dict, Any, Callable, TypeVar, Union
 from datetime import datetime, timezone
 import numpy as np
 
 from . import config
+from .vector_index import InMemoryVectorIndex
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .vector_codec import to_bson_vector, from_bson_vector
+from .result_cache import RetrievalResultCache
+from .rerank import maximal_marginal_relevance
+from common.instrumentation import track
+
+T = TypeVar("T")
 
 _client: Optional[MongoClient] = None
 _db = None
+_executor: Optional[ThreadPoolExecutor] = None
+# Whether the deployment is a replica set or sharded cluster; None until first checked.
+_supports_transactions: Optional[bool] = None
+# Atlas rejects a $vectorSearch whose numCandidates exceeds this.
+_ATLAS_MAX_NUM_CANDIDATES = 10000
+# user_id -> (embeddings_last_updated, monotonic expiry) for users known to be indexed.
+_index_status_cache: Dict[str, tuple] = {}
+_index_status_lock = threading.Lock()
+_vector_index = InMemoryVectorIndex(
+    ann_threshold=config.VECTOR_ANN_THRESHOLD, ann_ef=config.VECTOR_ANN_EF,
+    max_partitions=config.VECTOR_INDEX_MAX_PARTITIONS
+)
+_lexical_index = LexicalIndex(max_partitions=config.VECTOR_INDEX_MAX_PARTITIONS)
+_result_cache = RetrievalResultCache(max_entries=config.RETRIEVAL_CACHE_SIZE)
+
+def _invalidate_search_indexes(user_id: str, namespace: Optional[str] = None) -> None:
+    """Bumps the user's index version and drops the in-memory partitions touched by a chunk write."""
+    # Bump first: a partition load that checks the version before this bump is dropped by the invalidation below.
+    _result_cache.bump(user_id)
+    _vector_index.invalidate(user_id, namespace)
+    _lexical_index.invalidate(user_id, namespace)
+
+def _utc_now() -> datetime:
+    """The current time at MongoDB's millisecond precision, so a stamp reads back exactly as written."""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def _index_stamp(user_id: str) -> Optional[int]:
+    """
+    The user's persisted `embeddings_last_updated`, in epoch milliseconds. Every
+    chunk write stamps it, so it also changes when another process (bulk_index,
+    another worker or replica) rewrites the user's chunks; it is read through
+    the INDEX_STATUS_TTL_SECONDS cache of get_user_index_status.
+    """
+    last_updated = get_user_index_status(user_id)
+    if last_updated is None:
+        return None
+    if last_updated.tzinfo is None:
+        last_updated = last_updated.replace(tzinfo=timezone.utc)
+    return int(last_updated.timestamp() * 1000)
+
+def _touch_user_index(user_id: str) -> None:
+    """Re-stamps an indexed user's `embeddings_last_updated` after their chunks changed."""
+    last_updated = _utc_now()
+    result = get_users_collection().update_one(
+        {"user_id": user_id, "embeddings_last_updated": {"$exists": True}},
+        {"$set": {"embeddings_last_updated": last_updated}}
+    )
+    if result.matched_count:
+        _cache_index_status(user_id, last_updated)
+
+def _is_current(user_id: str) -> Callable[[], bool]:
+    """Returns a check that no chunk write for the user has happened since it was created."""
+    version = _result_cache.version(user_id)
+    return lambda: _result_cache.version(user_id) == version
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    return _result_cache.stats()
 
 def init_db():
     global _client, _db
     if _client is None:
         print("Connecting to MongoDB Atlas...")
-        _client = MongoClient(config.MONGO_URI)
+        _client = MongoClient(config.MONGO_URI, maxPoolSize=config.MONGO_MAX_POOL_SIZE)
         _db = _client[config.MONGO_DB_NAME]
         
         try:
@@ -25,6 +97,29 @@ def init_db():
             print(f"MongoDB connection failed: {e}")
             raise
 
+def close_db():
+    global _client, _db, _executor, _supports_transactions
+    _supports_transactions = None
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    if _client is not None:
+        _client.close()
+        _client = None
+        _db = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.DB_EXECUTOR_WORKERS, thread_name_prefix="mongo")
+    return _executor
+
+async def run_async(func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs a blocking function from this module on the bounded database executor."""
+    loop = asyncio.get_running_loop()
+    with track("mongo", func.__name__):
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
 def get_chunks_collection() -> Collection:
     if _db is None: init_db()
     return _db["chunks"]
@@ -37,6 +132,14 @@ def get_users_collection() -> Collection:
     if _db is None: init_db()
     return _db["users"]
 
+def get_embedding_cache_collection() -> Collection:
+    if _db is None: init_db()
+    return _db["embedding_cache"]
+
+def get_index_jobs_collection() -> Collection:
+    if _db is None: init_db()
+    return _db["index_jobs"]
+
 def get_profile_by_id(user_id: str) -> Optional[Dict[str, Any]]:
     """Fetches a user's raw profile data by their user_id."""
     collection = get_profiles_collection()
@@ -59,47 +162,368 @@ def create_or_update_profile(profile_data: Dict[str, Any]) -> bool:
         print(f"Error creating/updating profile: {e}")
         return False
 
-def store_chunk(chunk_id: str, user_id: str, namespace: str, section_id: Optional[str],
-                source_type: str, source_id: str, text: str, embedding_vector: np.ndarray) -> None:
-    """Stores a single text chunk in the database."""
+def encode_embedding_fields(embedding_vector: np.ndarray) -> Dict[str, Any]:
+    """Returns the `embedding` (and, for int8 storage, `embedding_scale`) fields of a chunk document."""
+    stored, scale = to_bson_vector(embedding_vector, config.EMBEDDING_STORAGE_FORMAT)
+    fields = {"embedding": stored}
+    if scale is not None:
+        fields["embedding_scale"] = scale
+    return fields
+
+def _chunk_upserts(chunks: List[Dict[str, Any]], embeddings: np.ndarray) -> List[ReplaceOne]:
+    created_at = datetime.now(timezone.utc)
+    operations = []
+    for chunk, vector in zip(chunks, embeddings):
+        document = {
+            "_id": chunk["chunk_id"],
+            "user_id": chunk["user_id"],
+            "index_namespace": chunk["namespace"],
+            "section_id": chunk["section_id"],
+            "source_type": chunk["source_type"],
+            "source_id": chunk["source_id"],
+            "text": chunk["text"],
+            **encode_embedding_fields(vector),
+            "created_at": created_at
+        }
+        if "field_key" in chunk:
+            document["field_key"] = chunk["field_key"]
+            document["field_hash"] = chunk["field_hash"]
+        operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+    return operations
+
+def store_chunks(chunks: List[Dict[str, Any]], embeddings: np.ndarray) -> int:
+    """Stores many text chunks with a single bulk write. Returns the number of documents written."""
+    if not chunks:
+        return 0
     collection = get_chunks_collection()
-    document = {
-        "_id": chunk_id,
-        "user_id": user_id,
-        "index_namespace": namespace,
-        "section_id": section_id,
-        "source_type": source_type,
-        "source_id": source_id,
-        "text": text,
-        "embedding": embedding_vector.tolist(),
-        "created_at": datetime.now(timezone.utc)
-    }
-    collection.update_one(
-        {"_id": chunk_id},
-        {"$set": document},
-        upsert=True
-    )
+    result = collection.bulk_write(_chunk_upserts(chunks, embeddings), ordered=False)
+    for user_id, namespace in {(chunk["user_id"], chunk["namespace"]) for chunk in chunks}:
+        _invalidate_search_indexes(user_id, namespace)
+    return result.upserted_count + result.matched_count
+
+def get_section_chunk_ids(user_id: str, namespace: str, section_id: str) -> set:
+    """Returns the ids of the chunks currently stored for a user's section."""
+    collection = get_chunks_collection()
+    documents = collection.find({"user_id": user_id, "index_namespace": namespace, "section_id": section_id}, {"_id": 1})
+    return {doc["_id"] for doc in documents}
 
-def delete_chunks_by_section_id(user_id: str, section_id: str) -> int:
-    """Deletes all chunks associated with a specific user and section."""
+# "Transaction numbers are only allowed on a replica set member or mongos".
+_ILLEGAL_OPERATION = 20
+
+def supports_transactions() -> bool:
+    """True when the deployment is a replica set or a mongos; checked once with `hello`."""
+    global _supports_transactions
+    if _supports_transactions is None:
+        if _client is None: init_db()
+        hello = _client.admin.command("hello")
+        _supports_transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        if not _supports_transactions:
+            print("Standalone MongoDB detected: section replacements run without transactions.")
+    return _supports_transactions
+
+class SectionChangedError(RuntimeError):
+    """A chunk that a section replacement meant to keep was deleted by a concurrent writer."""
+
+def replace_section_chunks(user_id: str, namespace: str, section_id: str, chunk_ids: List[str],
+                           chunks: List[Dict[str, Any]], embeddings: np.ndarray) -> int:
+    """
+    Makes `chunk_ids` the only chunks of a user's section in one transaction:
+    writes `chunks` (the ids not stored yet) and deletes every other chunk of the
+    section. Returns the number of chunks deleted.
+
+    The user document is stamped in the same transaction, so two concurrent
+    replacements conflict and one is retried on top of the other instead of each
+    deleting the other's chunks. Raises SectionChangedError if a chunk that was
+    not re-written has disappeared in the meantime.
+
+    Transactions need a replica set (as every Atlas cluster is). On a standalone
+    deployment the same steps run without one, writing before deleting: readers
+    may briefly see old and new chunks together, and only replacements made by
+    this process are serialized (by the caller's per-section lock).
+    """
+    collection = get_chunks_collection()
+    operations = _chunk_upserts(chunks, embeddings)
+    kept_ids = list(set(chunk_ids) - {chunk["chunk_id"] for chunk in chunks})
+    last_updated = _utc_now()
+
+    def apply(session) -> int:
+        if kept_ids and collection.count_documents({"_id": {"$in": kept_ids}}, session=session) != len(kept_ids):
+            raise SectionChangedError(f"Section '{section_id}' of user '{user_id}' changed during replacement")
+        if operations:
+            collection.bulk_write(operations, ordered=False, session=session)
+        deleted = collection.delete_many(
+            {"user_id": user_id, "index_namespace": namespace, "section_id": section_id, "_id": {"$nin": chunk_ids}},
+            session=session
+        ).deleted_count
+        get_users_collection().update_one(
+            {"user_id": user_id},
+            {"$set": {"user_id": user_id, "embeddings_last_updated": last_updated}},
+            upsert=True, session=session
+        )
+        return deleted
+
+    global _supports_transactions
+    deleted = None
+    if supports_transactions():
+        try:
+            with _client.start_session() as session:
+                deleted = session.with_transaction(apply)
+        except OperationFailure as e:
+            if e.code != _ILLEGAL_OPERATION:
+                raise
+            _supports_transactions = False
+    if deleted is None:
+        deleted = apply(None)
+    _invalidate_search_indexes(user_id, namespace)
+    _cache_index_status(user_id, last_updated)
+    return deleted
+
+def delete_chunks_by_section_id(user_id: str, section_id: str, namespace: Optional[str] = None,
+                                keep_chunk_ids: Optional[List[str]] = None) -> int:
+    """Deletes the chunks of a user's section, optionally limited to a namespace and except `keep_chunk_ids`."""
     collection = get_chunks_collection()
-    result = collection.delete_many({"user_id": user_id, "section_id": section_id})
+    query = {"user_id": user_id, "section_id": section_id}
+    if namespace is not None:
+        query["index_namespace"] = namespace
+    if keep_chunk_ids:
+        query["_id"] = {"$nin": keep_chunk_ids}
+    result = collection.delete_many(query)
+    if result.deleted_count:
+        _invalidate_search_indexes(user_id, namespace)
+        _touch_user_index(user_id)
     return result.deleted_count
 
-def delete_user_chunks(user_id: str, namespace: str) -> int:
-    """Deletes all chunks for a user within a given namespace."""
+def get_field_fingerprints(user_id: str, namespace: str) -> Dict[Optional[str], str]:
+    """Returns {field_key: field_hash} for the source fields currently indexed for a user.
+
+    Chunks written before fingerprinting existed are reported under the key None.
+    """
     collection = get_chunks_collection()
-    result = collection.delete_many({"user_id": user_id, "index_namespace": namespace})
+    documents = collection.find(
+        {"user_id": user_id, "index_namespace": namespace},
+        {"field_key": 1, "field_hash": 1}
+    )
+    return {doc.get("field_key"): doc.get("field_hash") for doc in documents}
+
+def delete_field_chunks(user_id: str, namespace: str, field_keys: List[Optional[str]],
+                        keep_chunk_ids: Optional[List[str]] = None) -> int:
+    """Deletes the chunks of the given source fields, except for `keep_chunk_ids`."""
+    if not field_keys:
+        return 0
+    collection = get_chunks_collection()
+    keys = [key for key in field_keys if key is not None]
+    conditions = [{"field_key": {"$in": keys}}] if keys else []
+    if None in field_keys:
+        conditions.append({"field_key": {"$exists": False}})
+    query = {"user_id": user_id, "index_namespace": namespace, "$or": conditions}
+    if keep_chunk_ids:
+        query["_id"] = {"$nin": keep_chunk_ids}
+    result = collection.delete_many(query)
+    _invalidate_search_indexes(user_id, namespace)
+    if result.deleted_count:
+        _touch_user_index(user_id)
     return result.deleted_count
 
+def iter_profile_user_id_batches(after_user_id: Optional[str], batch_size: int):
+    """Yields batches of profile user_ids in ascending order, starting after `after_user_id`."""
+    collection = get_profiles_collection()
+    query = {"user_id": {"$gt": after_user_id}} if after_user_id else {"user_id": {"$exists": True}}
+    cursor = collection.find(query, {"user_id": 1, "_id": 0}).sort("user_id", ASCENDING).batch_size(batch_size)
+    batch = []
+    for doc in cursor:
+        batch.append(doc["user_id"])
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def count_profiles(after_user_id: Optional[str] = None) -> int:
+    query = {"user_id": {"$gt": after_user_id}} if after_user_id else {"user_id": {"$exists": True}}
+    return get_profiles_collection().count_documents(query)
+
+def get_profiles_by_ids(user_ids: List[str]) -> List[Dict[str, Any]]:
+    return list(get_profiles_collection().find({"user_id": {"$in": user_ids}}))
+
+def replace_users_chunks(user_ids: List[str], namespace: str, chunks: List[Dict[str, Any]],
+                         embeddings: np.ndarray) -> int:
+    """Writes the new chunks of many users in one bulk write, then deletes their previous chunks."""
+    written = store_chunks(chunks, embeddings)
+    collection = get_chunks_collection()
+    collection.delete_many({
+        "user_id": {"$in": user_ids},
+        "index_namespace": namespace,
+        "_id": {"$nin": [chunk["chunk_id"] for chunk in chunks]},
+    })
+    for user_id in user_ids:
+        _invalidate_search_indexes(user_id, namespace)
+    return written
+
+def mark_users_indexed(user_ids: List[str]) -> None:
+    """Bulk version of mark_user_indexed."""
+    if not user_ids:
+        return
+    last_updated = _utc_now()
+    get_users_collection().bulk_write([
+        UpdateOne(
+            {"user_id": user_id},
+            {"$set": {"user_id": user_id, "embeddings_last_updated": last_updated}},
+            upsert=True
+        )
+        for user_id in user_ids
+    ], ordered=False)
+    for user_id in user_ids:
+        _cache_index_status(user_id, last_updated)
+
+def get_index_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return get_index_jobs_collection().find_one({"_id": job_id})
+
+def save_index_job(job: Dict[str, Any]) -> None:
+    """Persists a bulk indexing job's progress; `last_user_id` is the resumable checkpoint."""
+    job["updated_at"] = datetime.now(timezone.utc)
+    get_index_jobs_collection().replace_one({"_id": job["_id"]}, job, upsert=True)
+
+def search_chunks(
+    user_id: str,
+    namespace: str,
+    query_vector: Union[List[float], np.ndarray],
+    top_k: int,
+    filter_by_section_ids: Optional[List[str]] = None,
+    search_mode: str = "vector",
+    query_text: Optional[str] = None,
+    rrf_k: int = 60,
+    diversity: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Runs a vector or hybrid search, serving repeats from the versioned result cache.
+    With `diversity` set, over-fetches candidates and reranks them with MMR.
+    """
+    cache_key = None
+    if config.RETRIEVAL_CACHE_SIZE > 0:
+        hybrid_params = (query_text, rrf_k) if search_mode == "hybrid" else (None, None)
+        cache_key = _result_cache.key(
+            user_id, namespace, query_vector, top_k, filter_by_section_ids, search_mode, *hybrid_params, diversity,
+            index_stamp=_index_stamp(user_id)
+        )
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    fetch_k = top_k if diversity is None else max(top_k * config.MMR_CANDIDATE_MULTIPLIER, top_k)
+    if search_mode == "hybrid":
+        results = search_chunks_hybrid(
+            user_id, namespace, query_vector, query_text, fetch_k, filter_by_section_ids, rrf_k=rrf_k
+        )
+    else:
+        results = search_chunks_vector(user_id, namespace, query_vector, fetch_k, filter_by_section_ids)
+    if diversity is not None:
+        results = _rerank_mmr(user_id, namespace, results, top_k, diversity)
+
+    if cache_key is not None:
+        _result_cache.put(cache_key, results)
+    return results
+
+def get_chunk_embeddings(user_id: str, namespace: str, chunk_ids: List[Any]) -> Dict[Any, np.ndarray]:
+    """Returns chunk embeddings by id, from the in-memory partition when loaded, else from Mongo."""
+    vectors = _vector_index.vectors(user_id, namespace, chunk_ids)
+    if vectors is not None:
+        return vectors
+    documents = get_chunks_collection().find(
+        {"_id": {"$in": chunk_ids}}, {"embedding": 1, "embedding_scale": 1}
+    )
+    return {doc["_id"]: from_bson_vector(doc["embedding"], doc.get("embedding_scale")) for doc in documents}
+
+def _rerank_mmr(
+    user_id: str,
+    namespace: str,
+    candidates: List[Dict[str, Any]],
+    top_k: int,
+    diversity: float
+) -> List[Dict[str, Any]]:
+    if len(candidates) <= 1:
+        return candidates[:top_k]
+    vectors = get_chunk_embeddings(user_id, namespace, [doc["_id"] for doc in candidates])
+    # A chunk deleted since the search has no embedding left; drop it rather than guess.
+    candidates = [doc for doc in candidates if doc["_id"] in vectors]
+    if not candidates:
+        return []
+    relevance = np.array([doc["score"] for doc in candidates], dtype=np.float32)
+    matrix = np.vstack([vectors[doc["_id"]] for doc in candidates])
+    order = maximal_marginal_relevance(relevance, matrix, top_k, diversity)
+    return [candidates[position] for position in order]
+
 def search_chunks_vector(
     user_id: str,
     namespace: str,
-    query_vector: List[float],
+    query_vector: Union[List[float], np.ndarray],
+    top_k: int,
+    filter_by_section_ids: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Performs a vector search for a user's chunks using the configured backend."""
+    if config.VECTOR_SEARCH_BACKEND == "memory":
+        return _search_chunks_in_memory(user_id, namespace, query_vector, top_k, filter_by_section_ids)
+    return _search_chunks_atlas(user_id, namespace, query_vector, top_k, filter_by_section_ids)
+
+def search_chunks_lexical(
+    user_id: str,
+    namespace: str,
+    query_text: str,
+    top_k: int,
+    filter_by_section_ids: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """BM25 search over a user's chunk text."""
+    stamp = _index_stamp(user_id)
+    partition = _lexical_index.get(user_id, namespace, stamp)
+    if partition is None:
+        is_current = _is_current(user_id)
+        collection = get_chunks_collection()
+        documents = collection.find(
+            {"user_id": user_id, "index_namespace": namespace}, {"embedding": 0, "embedding_scale": 0}
+        )
+        partition = _lexical_index.load(user_id, namespace, list(documents), is_current=is_current, stamp=stamp)
+    return _lexical_index.search(user_id, namespace, query_text, top_k, filter_by_section_ids, partition=partition)
+
+def search_chunks_hybrid(
+    user_id: str,
+    namespace: str,
+    query_vector: Union[List[float], np.ndarray],
+    query_text: str,
+    top_k: int,
+    filter_by_section_ids: Optional[List[str]] = None,
+    rrf_k: int = 60
+) -> List[Dict[str, Any]]:
+    """Fuses the vector and BM25 rankings of a user's chunks with reciprocal rank fusion."""
+    candidates = max(top_k * config.HYBRID_CANDIDATE_MULTIPLIER, top_k)
+    vector_results = search_chunks_vector(user_id, namespace, query_vector, candidates, filter_by_section_ids)
+    lexical_results = search_chunks_lexical(user_id, namespace, query_text, candidates, filter_by_section_ids)
+    return reciprocal_rank_fusion([vector_results, lexical_results], top_k, k=rrf_k)
+
+def _search_chunks_in_memory(
+    user_id: str,
+    namespace: str,
+    query_vector: Union[List[float], np.ndarray],
+    top_k: int,
+    filter_by_section_ids: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    # Partitions loaded before another process rewrote the user's chunks carry an older stamp and are reloaded.
+    stamp = _index_stamp(user_id)
+    partition = _vector_index.get(user_id, namespace, stamp)
+    if partition is None:
+        # Read the version before the find: if a write lands in between, this
+        # partition still answers this search but is not kept for later ones.
+        is_current = _is_current(user_id)
+        collection = get_chunks_collection()
+        documents = collection.find({"user_id": user_id, "index_namespace": namespace})
+        partition = _vector_index.load(user_id, namespace, list(documents), is_current=is_current, stamp=stamp)
+    return _vector_index.search(user_id, namespace, query_vector, top_k, filter_by_section_ids, partition=partition)
+
+def _search_chunks_atlas(
+    user_id: str,
+    namespace: str,
+    query_vector: Union[List[float], np.ndarray],
     top_k: int,
     filter_by_section_ids: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
-    """Performs a vector search for a user's chunks."""
     collection = get_chunks_collection()
     search_filter = {
         "user_id": user_id,
@@ -107,10 +531,13 @@ def search_chunks_vector(
     }
     if filter_by_section_ids:
         search_filter["section_id"] = {"$in": filter_by_section_ids}
+    # MMR and hybrid over-fetching multiply top_k, so clamp to what Atlas accepts (limit <= numCandidates).
+    num_candidates = min(top_k * 10, _ATLAS_MAX_NUM_CANDIDATES)
     pipeline = [
         {"$vectorSearch": {
-            "index": "vector_index", "path": "embedding", "queryVector": query_vector,
-            "numCandidates": top_k * 10, "limit": top_k, "filter": search_filter,
+            "index": "vector_index", "path": "embedding",
+            "queryVector": np.asarray(query_vector, dtype=np.float64).tolist(),
+            "numCandidates": num_candidates, "limit": min(top_k, num_candidates), "filter": search_filter,
         }},
         {"$project": {
             "_id": 1, "user_id": 1, "index_namespace": 1, "section_id": 1,
@@ -121,23 +548,45 @@ def search_chunks_vector(
     results = list(collection.aggregate(pipeline))
     return results
 
+def invalidate_index_status(user_id: str) -> None:
+    with _index_status_lock:
+        _index_status_cache.pop(user_id, None)
+
+def _cache_index_status(user_id: str, last_updated: datetime) -> None:
+    with _index_status_lock:
+        _index_status_cache[user_id] = (last_updated, time.monotonic() + config.INDEX_STATUS_TTL_SECONDS)
+
 def mark_user_indexed(user_id: str) -> None:
     """Marks a user as indexed in the 'users' collection, querying by user_id."""
     users_collection = get_users_collection()
+    last_updated = _utc_now()
     users_collection.update_one(
         {"user_id": user_id},
         {"$set": {
             "user_id": user_id,
-            "embeddings_last_updated": datetime.now(timezone.utc)
+            "embeddings_last_updated": last_updated
         }},
         upsert=True
     )
+    _cache_index_status(user_id, last_updated)
 
 def get_user_index_status(user_id: str) -> Optional[datetime]:
-    """Checks the indexing status of a user by their user_id."""
+    """Checks the indexing status of a user by their user_id.
+
+    Positive answers are cached for INDEX_STATUS_TTL_SECONDS; unindexed users are always re-read.
+    """
+    cached = _index_status_cache.get(user_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
     users_collection = get_users_collection()
     user_doc = users_collection.find_one(
         {"user_id": user_id},
         {"embeddings_last_updated": 1}
     )
-    return user_doc.get("embeddings_last_updated") if user_doc else None
\ No newline at end of file
+    last_updated = user_doc.get("embeddings_last_updated") if user_doc else None
+    if last_updated:
+        _cache_index_status(user_id, last_updated)
+    else:
+        invalidate_index_status(user_id)
+    return last_updated
\ No newline at end of file
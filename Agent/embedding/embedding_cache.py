@@ -0,0 +1,129 @@
+# embedding/embedding_cache.py
+
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Dict, Callable
+import numpy as np
+from bson.binary import Binary
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Two-tier cache of normalized embeddings keyed by model name plus a SHA-256 of the text.
+
+    The first tier is a bounded in-memory LRU. The optional second tier is a
+    MongoDB collection that survives restarts; its documents are tagged with the
+    model name so that switching `config.MODEL_NAME` never serves stale vectors.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        collection_getter: Optional[Callable[[], Collection]] = None
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._collection_getter = collection_getter
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def set_model(self, model_name: str) -> None:
+        """Invalidates the in-memory tier when the model changes."""
+        if model_name != self.model_name:
+            logger.info(f"Embedding model changed from {self.model_name} to {model_name}; clearing embedding cache")
+            self.model_name = model_name
+            self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Looks up every text, returning None for misses. Persistent hits are promoted to memory."""
+        keys = [self.key(text) for text in texts]
+        found: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                found[i] = vector
+                self.hits += 1
+
+        if missing and self._collection_getter is not None:
+            for key, vector in self._load_persistent(list(missing)).items():
+                for i in missing.pop(key):
+                    found[i] = vector
+                    self.persistent_hits += 1
+                self._put(key, vector)
+
+        self.misses += sum(len(positions) for positions in missing.values())
+        return found
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        keys = [self.key(text) for text in texts]
+        for key, vector in zip(keys, vectors):
+            self._put(key, vector)
+        if self._collection_getter is not None:
+            self._store_persistent(keys, vectors)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load_persistent(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        try:
+            documents = self._collection_getter().find(
+                {"_id": {"$in": keys}, "model": self.model_name}, {"vector": 1}
+            )
+            return {doc["_id"]: np.frombuffer(doc["vector"], dtype=np.float32) for doc in documents}
+        except Exception as e:
+            logger.warning(f"Persistent embedding cache lookup failed: {e}")
+            return {}
+
+    def _store_persistent(self, keys: List[str], vectors: np.ndarray) -> None:
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                {"$set": {"model": self.model_name, "vector": Binary(np.asarray(vector, dtype=np.float32).tobytes())}},
+                upsert=True
+            )
+            for key, vector in zip(keys, vectors)
+        ]
+        try:
+            self._collection_getter().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"Persistent embedding cache write failed: {e}")
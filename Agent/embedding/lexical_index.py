@@ -0,0 +1,161 @@
+# embedding/lexical_index.py
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, List, Optional, Dict, Any, Tuple
+import numpy as np
+
+from .vector_index import RESULT_FIELDS
+
+# Keeps technology names such as "c++", "c#", "node.js" and "ci/cd" as single terms.
+_TERM = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+def tokenize(text: str) -> List[str]:
+    return _TERM.findall(text.lower())
+
+class _LexicalPartition:
+    """BM25 statistics for the chunks of one (user_id, namespace) pair."""
+
+    def __init__(self, documents: List[Dict[str, Any]], k1: float, b: float):
+        self.documents = documents
+        self.section_ids = np.array([doc.get("section_id") for doc in documents], dtype=object)
+        self.k1 = k1
+        self.b = b
+        self.stamp = None
+        lengths = []
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for position, doc in enumerate(documents):
+            terms = Counter(tokenize(doc.get("text") or ""))
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                doc_ids, tfs = postings.setdefault(term, ([], []))
+                doc_ids.append(position)
+                tfs.append(tf)
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        self.avg_length = float(self.lengths.mean()) if lengths else 0.0
+        n = len(documents)
+        self.postings = {
+            term: (np.asarray(doc_ids), np.asarray(tfs, dtype=np.float32),
+                   math.log(1.0 + (n - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5)))
+            for term, (doc_ids, tfs) in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def scores(self, query_terms: List[str]) -> np.ndarray:
+        scores = np.zeros(len(self), dtype=np.float32)
+        if self.avg_length == 0:
+            return scores
+        norm = self.k1 * (1.0 - self.b + self.b * self.lengths / self.avg_length)
+        for term in set(query_terms):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            doc_ids, tfs, idf = posting
+            scores[doc_ids] += idf * tfs * (self.k1 + 1.0) / (tfs + norm[doc_ids])
+        return scores
+
+class LexicalIndex:
+    """
+    Per-user BM25 index over chunk text, kept in process memory next to the vector index.
+
+    Partitions are built lazily from the chunks collection and dropped by the same
+    writes that invalidate the in-memory vector partitions. At most `max_partitions`
+    are kept, least recently used first out.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_partitions: int = 1024):
+        self.k1 = k1
+        self.b = b
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[Tuple[str, str], _LexicalPartition]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, namespace: str, stamp: Any = None) -> Optional[_LexicalPartition]:
+        """Returns the loaded partition, or None when it is missing or was loaded under another index stamp."""
+        with self._lock:
+            partition = self._partitions.get((user_id, namespace))
+            if partition is None or partition.stamp != stamp:
+                return None
+            self._partitions.move_to_end((user_id, namespace))
+            return partition
+
+    def load(
+        self,
+        user_id: str,
+        namespace: str,
+        documents: List[Dict[str, Any]],
+        is_current: Optional[Callable[[], bool]] = None,
+        stamp: Any = None
+    ) -> _LexicalPartition:
+        """
+        Builds the partition for a user/namespace and returns it. It is only kept
+        for later searches if `is_current()` still holds once it is built, and
+        only served by `get` while the user's index stamp is still `stamp`.
+        """
+        metadata = [{field: doc.get(field) for field in RESULT_FIELDS} for doc in documents]
+        partition = _LexicalPartition(metadata, self.k1, self.b)
+        partition.stamp = stamp
+        with self._lock:
+            if is_current is None or is_current():
+                self._partitions[(user_id, namespace)] = partition
+                self._partitions.move_to_end((user_id, namespace))
+                while len(self._partitions) > self.max_partitions:
+                    self._partitions.popitem(last=False)
+        return partition
+
+    def invalidate(self, user_id: str, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is not None:
+                self._partitions.pop((user_id, namespace), None)
+                return
+            for key in [key for key in self._partitions if key[0] == user_id]:
+                del self._partitions[key]
+
+    def search(
+        self,
+        user_id: str,
+        namespace: str,
+        query_text: str,
+        top_k: int,
+        filter_by_section_ids: Optional[List[str]] = None,
+        partition: Optional[_LexicalPartition] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns up to top_k chunks with a positive BM25 score, best first."""
+        if partition is None:
+            partition = self._partitions.get((user_id, namespace))
+        if partition is None or len(partition) == 0:
+            return []
+        scores = partition.scores(tokenize(query_text))
+        if filter_by_section_ids:
+            scores[~np.isin(partition.section_ids, filter_by_section_ids)] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size == 0:
+            return []
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:top_k]]
+        results = []
+        for position in top:
+            result = dict(partition.documents[position])
+            result["score"] = float(scores[position])
+            results.append(result)
+        return results
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], top_k: int, k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked result lists with RRF: score = sum(1 / (k + rank)).
+
+    The fused score is divided by its maximum possible value (rank 1 in every list),
+    so it stays in [0, 1] like the vector similarity scores.
+    """
+    fused: Dict[Any, float] = {}
+    documents: Dict[Any, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            fused[doc["_id"]] = fused.get(doc["_id"], 0.0) + 1.0 / (k + rank)
+            documents.setdefault(doc["_id"], doc)
+    best_possible = len(rankings) / (k + 1.0)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [{**documents[chunk_id], "score": score / best_possible} for chunk_id, score in ordered]
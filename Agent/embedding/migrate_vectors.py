@@ -0,0 +1,66 @@
+# embedding/migrate_vectors.py
+"""
+Converts chunk embeddings stored as BSON arrays of doubles into the compact
+binary format selected by EMBEDDING_STORAGE_FORMAT (or --format).
+
+    python -m embedding.migrate_vectors --batch-size 500
+    python -m embedding.migrate_vectors --format int8 --dry-run
+"""
+
+import argparse
+import time
+from typing import get_args
+
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+load_dotenv()
+
+from . import db, config
+from .vector_codec import StorageFormat, to_bson_vector, from_bson_vector
+
+def migrate(storage_format: str, batch_size: int, dry_run: bool = False) -> int:
+    collection = db.get_chunks_collection()
+    if storage_format == "array":
+        query = {"embedding": {"$not": {"$type": "array"}}}
+    elif storage_format == "int8":
+        query = {"embedding": {"$exists": True}, "embedding_scale": {"$exists": False}}
+    else:
+        query = {"$or": [{"embedding": {"$type": "array"}}, {"embedding_scale": {"$exists": True}}]}
+
+    total = collection.count_documents(query)
+    print(f"{total} chunks to convert to '{storage_format}'{' (dry run)' if dry_run else ''}.")
+    if dry_run or total == 0:
+        return 0
+
+    converted = 0
+    started = time.perf_counter()
+    operations = []
+    cursor = collection.find(query, {"embedding": 1, "embedding_scale": 1}, batch_size=batch_size)
+    for doc in cursor:
+        vector = from_bson_vector(doc["embedding"], doc.get("embedding_scale"))
+        stored, scale = to_bson_vector(vector, storage_format)
+        update = {"$set": {"embedding": stored}}
+        if scale is not None:
+            update["$set"]["embedding_scale"] = scale
+        else:
+            update["$unset"] = {"embedding_scale": ""}
+        operations.append(UpdateOne({"_id": doc["_id"]}, update))
+        if len(operations) >= batch_size:
+            converted += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+            print(f"  {converted}/{total} converted ({converted / (time.perf_counter() - started):.0f} chunks/s)")
+    if operations:
+        converted += collection.bulk_write(operations, ordered=False).modified_count
+
+    print(f"Converted {converted} chunks in {time.perf_counter() - started:.1f}s.")
+    return converted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=get_args(StorageFormat), default=config.EMBEDDING_STORAGE_FORMAT)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the chunks that would be converted")
+    args = parser.parse_args()
+    db.init_db()
+    migrate(args.format, args.batch_size, args.dry_run)
+    db.close_db()
@@ -1,21 +1,40 @@
 from sentence_transformers import SentenceTransformer
+import asyncio
 import numpy as np
-from typing import Optional, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Union, Tuple
 import logging
-from . import config
+from . import config, db, chunking
+from .embedding_cache import EmbeddingCache
+from common.model_backends import load_sentence_transformer
+from common.instrumentation import timed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 _model: Optional[SentenceTransformer] = None
+_cache = EmbeddingCache(
+    model_name=config.MODEL_NAME,
+    max_entries=config.EMBEDDING_CACHE_SIZE,
+    collection_getter=db.get_embedding_cache_collection if config.EMBEDDING_CACHE_PERSISTENT else None
+)
 
-def load_model(model_name: str = config.MODEL_NAME) -> SentenceTransformer:
+def load_model(model_name: str = config.MODEL_NAME, backend: str = config.INFERENCE_BACKEND) -> SentenceTransformer:
     global _model
     if _model is None:
         try:
-            logger.info(f"Loading sentence transformer model: {model_name}")
-            _model = SentenceTransformer(model_name)
+            logger.info(f"Loading sentence transformer model: {model_name} ({backend} backend)")
+            _model, active_backend = load_sentence_transformer(
+                model_name,
+                backend=backend,
+                export_root=config.ONNX_EXPORT_DIR,
+                min_parity=config.ONNX_MIN_PARITY
+            )
+            # Quantized backends produce slightly different vectors, so they get their own cache namespace.
+            # Name it after the backend actually loaded: a failed parity check falls back to torch.
+            _cache.set_model(model_name if active_backend == "torch" else f"{model_name}@{active_backend}")
             _ = _model.encode("test", convert_to_numpy=True)
+            chunking.set_tokenizer(_model.tokenizer)
             logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
@@ -31,6 +50,21 @@ def _normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
         norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
         return np.divide(embeddings, norms, where=(norms > 0))
 
+def get_cache_stats() -> dict:
+    return _cache.stats()
+
+@timed("model", "encode")
+def _encode(texts: List[str], batch_size: int) -> np.ndarray:
+    embeddings = _model.encode(
+        texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=False
+    )
+    embeddings = embeddings.astype(np.float32)
+    return _normalize_embeddings(embeddings)
+
 def embed_text(text: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
     if _model is None:
         raise RuntimeError("Model has not been loaded. Call load_model() first.")
@@ -41,20 +75,155 @@ def embed_text(text: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
     try:
         is_single = isinstance(text, str)
         texts = [text] if is_single else text
-        
-        embeddings = _model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-            normalize_embeddings=False
-        )
-        
-        embeddings = embeddings.astype(np.float32)
-        embeddings = _normalize_embeddings(embeddings)
+
+        cached = _cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            # Encode each distinct uncached text once, even if it repeats in the batch.
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = _encode(unique_texts, batch_size)
+            _cache.put_many(unique_texts, encoded)
+            by_text = dict(zip(unique_texts, encoded))
+            for i in missing:
+                cached[i] = by_text[texts[i]]
+
+        embeddings = np.vstack(cached).astype(np.float32, copy=False)
         
         return embeddings[0] if is_single else embeddings
         
     except Exception as e:
         logger.error(f"Error generating embeddings: {e}")
-        raise
\ No newline at end of file
+        raise
+
+class InferenceScheduler:
+    """
+    Coalesces concurrent encode requests into micro-batches.
+
+    Requests are queued from the event loop. A single worker task collects them
+    until `max_batch_size` texts are pending or `window_ms` has passed since the
+    first one arrived, runs one `embed_text` call on a dedicated encode thread and
+    hands each caller its slice of the result.
+    """
+
+    def __init__(self, max_batch_size: int = 64, window_ms: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.batches = 0
+        self.batched_texts = 0
+        self.last_batch_size = 0
+        self.max_batch_seen = 0
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference scheduler stopped."))
+        if self._executor is not None:
+            # An encode already running finishes in the background; its callers have been failed.
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, texts: List[str]) -> np.ndarray:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((texts, future))
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size_seen": self.max_batch_seen,
+            "avg_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000,
+        }
+
+    async def _collect(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        """Fills `batch` in place, so requests already taken off the queue are visible if this is cancelled."""
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        size = len(batch[0][0])
+        deadline = loop.time() + self.window
+        while size < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+
+    @staticmethod
+    def _fail(batch: List[Tuple[List[str], asyncio.Future]], error: BaseException) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[List[str], asyncio.Future]] = []
+            try:
+                await self._collect(batch)
+                texts = [text for request_texts, _ in batch for text in request_texts]
+                self.batches += 1
+                self.batched_texts += len(texts)
+                self.last_batch_size = len(texts)
+                self.max_batch_seen = max(self.max_batch_seen, len(texts))
+                try:
+                    embeddings = await loop.run_in_executor(self._executor, embed_text, texts)
+                except Exception as e:
+                    self._fail(batch, e)
+                    continue
+
+                offset = 0
+                for request_texts, future in batch:
+                    if not future.done():
+                        future.set_result(embeddings[offset:offset + len(request_texts)])
+                    offset += len(request_texts)
+            finally:
+                # Only callers of a batch interrupted by stop() are still waiting here.
+                self._fail(batch, RuntimeError("Inference scheduler stopped."))
+
+_scheduler = InferenceScheduler(
+    max_batch_size=config.INFERENCE_MAX_BATCH_SIZE,
+    window_ms=config.INFERENCE_BATCH_WINDOW_MS
+)
+
+async def embed_text_async(text: Union[str, List[str]]) -> np.ndarray:
+    """Like embed_text, but runs through the micro-batching scheduler without blocking the event loop."""
+    if not text:
+        return np.array([])
+    is_single = isinstance(text, str)
+    embeddings = await _scheduler.submit([text] if is_single else list(text))
+    return embeddings[0] if is_single else embeddings
+
+def start_scheduler() -> None:
+    _scheduler.start()
+
+async def stop_scheduler() -> None:
+    await _scheduler.stop()
+
+def get_inference_stats() -> dict:
+    return _scheduler.stats()
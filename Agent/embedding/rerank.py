@@ -0,0 +1,43 @@
+# embedding/rerank.py
+
+from typing import List
+import numpy as np
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    top_k: int,
+    diversity: float
+) -> List[int]:
+    """
+    Selects top_k candidate positions by Maximal Marginal Relevance.
+
+    Each step picks the candidate maximizing
+    (1 - diversity) * relevance - diversity * max_similarity_to_selected,
+    where similarities are cosines rescaled to [0, 1] like the search scores.
+    The pairwise similarity matrix is computed once, and the running maximum
+    is updated with one vectorized row per step.
+    """
+    n = relevance.shape[0]
+    top_k = min(top_k, n)
+    if top_k == 0:
+        return []
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+    similarity = (1.0 + vectors @ vectors.T) / 2.0
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+    for _ in range(top_k):
+        # Nothing is selected on the first step, so the best-scoring candidate always leads.
+        marginal = (1.0 - diversity) * relevance - (diversity * max_similarity if selected else 0.0)
+        marginal = np.where(available, marginal, -np.inf)
+        choice = int(np.argmax(marginal))
+        selected.append(choice)
+        available[choice] = False
+        np.maximum(max_similarity, similarity[choice], out=max_similarity)
+    return selected
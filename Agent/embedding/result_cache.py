@@ -0,0 +1,89 @@
+# embedding/result_cache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
+
+class RetrievalResultCache:
+    """
+    Bounded LRU of search results, scoped by a per-user index version.
+
+    Every chunk write or delete in this process bumps the user's version. The
+    caller also passes the user's persisted index stamp, which picks up writes
+    made by other processes. Because both are part of the cache key, results
+    computed before a write are not served afterwards; they simply age out of
+    the LRU.
+
+    Versions come from one counter shared by all users, and only the
+    `max_users` most recently bumped are remembered. A forgotten user reads
+    the highest version forgotten so far, which is never lower than their
+    own, so forgetting a user can cost cache misses but never a stale hit.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_users: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_users = max_users if max_users is not None else max(max_entries, 1)
+        self._entries: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._last_version = 0
+        self._forgotten_version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id: str) -> int:
+        with self._lock:
+            return self._versions.get(user_id, self._forgotten_version)
+
+    def bump(self, user_id: str) -> None:
+        with self._lock:
+            self._last_version += 1
+            self._versions[user_id] = self._last_version
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_users:
+                _, forgotten = self._versions.popitem(last=False)
+                self._forgotten_version = max(self._forgotten_version, forgotten)
+
+    def key(
+        self,
+        user_id: str,
+        namespace: str,
+        query_vector,
+        top_k: int,
+        filter_by_section_ids: Optional[List[str]],
+        *extra: Any,
+        index_stamp: Any = None
+    ) -> Tuple:
+        """Builds a cache key; read it *before* searching so a concurrent write makes the entry unreachable."""
+        vector_digest = hashlib.sha1(np.asarray(query_vector, dtype=np.float32).tobytes()).hexdigest()
+        sections = tuple(sorted(filter_by_section_ids)) if filter_by_section_ids else None
+        return (user_id, self.version(user_id), index_stamp, namespace, vector_digest, top_k, sections, *extra)
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = list(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,15 +1,33 @@
-from pydantic import BaseModel, Field, AliasChoices
+from pydantic import BaseModel, Field, AliasChoices, PrivateAttr, model_validator
 from typing import List, Optional, Literal, Dict
 from datetime import datetime
+import numpy as np
 from . import config
+from .vector_codec import VectorEncoding, decode_vectors
 
 IndexNamespace = Literal['profile', 'resume_sections']
+SearchMode = Literal['vector', 'hybrid']
 
 class EmbedRequest(BaseModel):
     text: str = Field(..., min_length=1)
+    encoding: VectorEncoding = Field(default='json', description="How the returned vector is encoded")
 
 class EmbedResponse(BaseModel):
-    embedding: List[float]
+    embedding: Optional[List[float]] = Field(default=None, description="The vector, when encoding is 'json'")
+    embedding_b64: Optional[str] = Field(default=None, description="Base64 little-endian vector for compact encodings")
+    encoding: VectorEncoding = 'json'
+    dim: int = config.EMBEDDING_DIM
+
+class EmbedBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+    encoding: VectorEncoding = Field(default='json', description="How the returned vectors are encoded")
+
+class EmbedBatchResponse(BaseModel):
+    embeddings: Optional[List[List[float]]] = Field(default=None, description="One vector per text, when encoding is 'json'")
+    embeddings_b64: Optional[str] = Field(default=None, description="Base64 row-major (count x dim) matrix for compact encodings")
+    encoding: VectorEncoding = 'json'
+    count: int
+    dim: int = config.EMBEDDING_DIM
 
 class IndexSectionRequest(BaseModel):
     section_id: str = Field(..., description="A unique identifier for the section")
@@ -43,21 +61,82 @@ class CreateProfileRequest(ProfileBase):
 class IndexProfileResponse(BaseModel):
     status: str
     message: str
+    chunks: int = Field(default=0, description="Number of chunks written")
+    chunks_per_sec: float = Field(default=0.0, description="End-to-end indexing throughput")
+    encode_ms: float = Field(default=0.0, description="Time spent in the batched model encode")
+    write_ms: float = Field(default=0.0, description="Time spent in the bulk database write")
+    fields_changed: int = Field(default=0, description="Profile fields that were new or edited and got re-embedded")
+    fields_unchanged: int = Field(default=0, description="Profile fields skipped because their fingerprint matched")
+    fields_removed: int = Field(default=0, description="Profile fields whose chunks were deleted")
+
+class BulkIndexRequest(BaseModel):
+    job_id: Optional[str] = Field(default=None, description="Resume this job from its checkpoint; a new job is created if omitted")
+    batch_size: int = Field(default=64, ge=1, le=1000, description="Profiles per worker task and bulk write")
+    workers: Optional[int] = Field(default=None, ge=1, le=64, description="Worker processes (default: half the CPUs)")
+
+class BulkIndexJobResponse(BaseModel):
+    job_id: str = Field(..., validation_alias=AliasChoices("job_id", "_id"))
+    status: str
+    total_users: int = 0
+    processed_users: int = 0
+    failed_users: int = 0
+    chunks_written: int = 0
+    last_user_id: Optional[str] = Field(default=None, description="Resumable checkpoint: the last committed user_id")
+    users_per_sec: float = 0.0
+    eta_seconds: Optional[float] = None
 
 class DeleteSectionResponse(BaseModel):
     status: str
     section_id: str
 
-class RetrieveRequest(BaseModel):
-    query_embedding: List[float] = Field(
-        ..., 
+class RetrieveOptions(BaseModel):
+    top_k: int = Field(default=5, description="Number of top results to return", ge=1, le=100)
+    index_namespace: IndexNamespace = Field(default='profile', description="The namespace of the index")
+    filter_by_section_ids: Optional[List[str]] = Field(default=None, description="Optional list of section IDs to filter by")
+    search_mode: SearchMode = Field(default='vector', description="'hybrid' fuses vector and BM25 rankings with reciprocal rank fusion")
+    rrf_k: int = Field(default=60, ge=1, le=1000, description="Reciprocal rank fusion constant")
+    diversity: Optional[float] = Field(
+        default=None, ge=0.0, le=1.0,
+        description="Enables MMR reranking; 0 ranks by relevance only, higher values penalize near-duplicate chunks"
+    )
+
+class RetrieveRequest(RetrieveOptions):
+    query_embedding: Optional[List[float]] = Field(
+        default=None,
         description=f"The {config.EMBEDDING_DIM}-dimensional embedding of the query", 
         min_length=config.EMBEDDING_DIM, 
         max_length=config.EMBEDDING_DIM
     )
-    top_k: int = Field(default=5, description="Number of top results to return", ge=1, le=100)
-    index_namespace: IndexNamespace = Field(default='profile', description="The namespace of the index")
-    filter_by_section_ids: Optional[List[str]] = Field(default=None, description="Optional list of section IDs to filter by")
+    query_embedding_b64: Optional[str] = Field(
+        default=None,
+        description="The query embedding as base64 little-endian floats; an alternative to query_embedding"
+    )
+    query_encoding: VectorEncoding = Field(default='base64_f32', description="Encoding of query_embedding_b64")
+    _decoded_query: Optional[np.ndarray] = PrivateAttr(default=None)
+    query_text: Optional[str] = Field(default=None, description="Raw query text for the lexical ranker; required for hybrid mode")
+
+    @model_validator(mode="after")
+    def _check_query_vector(self):
+        if (self.query_embedding is None) == (self.query_embedding_b64 is None):
+            raise ValueError("Provide exactly one of query_embedding or query_embedding_b64")
+        if self.search_mode == 'hybrid' and not self.query_text:
+            raise ValueError("query_text is required when search_mode is 'hybrid'")
+        if self.query_embedding_b64 is not None:
+            if self.query_encoding == 'json':
+                raise ValueError("query_encoding must be a base64 encoding when query_embedding_b64 is set")
+            decoded = decode_vectors(self.query_embedding_b64, self.query_encoding, config.EMBEDDING_DIM)
+            if decoded.shape[0] != 1:
+                raise ValueError("query_embedding_b64 must contain exactly one vector")
+            self._decoded_query = decoded[0]
+        return self
+
+    def query_vector(self) -> np.ndarray:
+        if self._decoded_query is not None:
+            return self._decoded_query
+        return np.asarray(self.query_embedding, dtype=np.float32)
+
+class RetrieveByTextRequest(RetrieveOptions):
+    query_text: str = Field(..., min_length=1, description="Query text; it is embedded here and also feeds the lexical ranker")
 
 class ChunkItem(BaseModel):
     chunk_id: str = Field(..., validation_alias=AliasChoices("chunk_id", "_id"))
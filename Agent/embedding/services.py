@@ -1,69 +1,236 @@
-import uuid
-from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+import time
+from typing import List, Optional, Dict, Any
 import numpy as np
 
-from . import db, chunking, model
+from . import db, chunking, model, config
 
-async def process_and_store_text_chunks(
+logger = logging.getLogger(__name__)
+
+# user_id -> in-progress profile indexing task, shared by every concurrent caller.
+_indexing_tasks: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+# Users whose in-progress indexing run may have read the profile before a caller asked for a fresh index.
+_rerun_requested: set = set()
+# (user_id, section_id) -> [lock, number of holders and waiters]; serializes replacements of a section in this process.
+_section_locks: Dict[tuple, list] = {}
+
+SECTION_REPLACE_ATTEMPTS = 3
+
+def _empty_index_stats() -> Dict[str, Any]:
+    return {
+        "chunks": 0, "chunks_per_sec": 0.0, "encode_ms": 0.0, "write_ms": 0.0,
+        "fields_changed": 0, "fields_unchanged": 0, "fields_removed": 0,
+    }
+
+def field_key(source_type: str, source_id: str) -> str:
+    return f"{source_type}:{source_id}"
+
+def field_fingerprint(text: str) -> str:
+    """Fingerprint of a source field; includes the model and chunker settings so changing either re-embeds everything."""
+    salt = f"{config.MODEL_NAME}\0{chunking.fingerprint_salt()}"
+    return hashlib.sha256(f"{salt}\0{text}".encode("utf-8")).hexdigest()
+
+def chunk_id(user_id: str, namespace: str, section_id: Optional[str], source_id: str, text: str) -> str:
+    """
+    Content-addressed chunk id. Re-indexing unchanged text yields the same id, so
+    writes become idempotent and unchanged chunks can be skipped. The model and
+    chunker settings are part of the hash, so changing either produces new ids.
+    """
+    salt = f"{config.MODEL_NAME}\0{chunking.fingerprint_salt()}"
+    key = "\0".join([salt, user_id, namespace, section_id or "", source_id, text])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def build_pending_chunks(
     user_id: str,
     namespace: str,
     text_items: List[tuple[str, str, str]],
     section_id: Optional[str] = None,
-) -> List[str]:
-    all_chunk_ids = []
+    fingerprint_fields: bool = False,
+) -> List[Dict[str, Any]]:
+    """Chunks every text item into chunk documents (without embeddings) ready for db.store_chunks."""
+    pending_chunks = []
     for source_type, source_id, text in text_items:
         chunks = chunking.chunk_text(text)
-        if not chunks:
-            continue
-
-        embeddings = model.embed_text(chunks)
-        
+        chunk_section_id = section_id if section_id is not None else source_type
+        field_metadata = {}
+        if fingerprint_fields:
+            field_metadata = {"field_key": field_key(source_type, source_id), "field_hash": field_fingerprint(text)}
         for i, chunk_text in enumerate(chunks):
-            chunk_id = str(uuid.uuid4())
-            embedding_vector = embeddings[i]
-
-            chunk_section_id = section_id if section_id is not None else source_type
-
-            db.store_chunk(
-                chunk_id=chunk_id,
-                user_id=user_id,
-                namespace=namespace,
-                section_id=chunk_section_id,
-                source_type=source_type,
-                source_id=f"{source_id}_{i}",
-                text=chunk_text,
-                embedding_vector=embedding_vector,
-            )
-            all_chunk_ids.append(chunk_id)
-            
-    db.mark_user_indexed(user_id)
-    return all_chunk_ids
-
-async def index_profile_from_db(user_id: str) -> int:
-    db.delete_user_chunks(user_id, namespace="profile")
-    profile_data = db.get_profile_by_id(user_id)
+            chunk_source_id = f"{source_id}_{i}"
+            pending_chunks.append({
+                "chunk_id": chunk_id(user_id, namespace, chunk_section_id, chunk_source_id, chunk_text),
+                "user_id": user_id,
+                "namespace": namespace,
+                "section_id": chunk_section_id,
+                "source_type": source_type,
+                "source_id": chunk_source_id,
+                "text": chunk_text,
+                **field_metadata,
+            })
+    return pending_chunks
+
+async def process_and_store_text_chunks(
+    user_id: str,
+    namespace: str,
+    text_items: List[tuple[str, str, str]],
+    section_id: Optional[str] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    fingerprint_fields: bool = False,
+) -> List[str]:
+    """
+    Chunks every text item, encodes all chunks in one batched forward pass and
+    persists them with a single bulk write. If `stats` is given it is filled
+    with throughput counters for the run. With `fingerprint_fields` every chunk
+    also records the key and fingerprint of the field it came from.
+    """
+    started = time.perf_counter()
+    pending_chunks = build_pending_chunks(user_id, namespace, text_items, section_id, fingerprint_fields)
+
+    encode_ms = write_ms = 0.0
+    if pending_chunks:
+        encode_started = time.perf_counter()
+        embeddings = await model.embed_text_async([chunk["text"] for chunk in pending_chunks])
+        encode_ms = (time.perf_counter() - encode_started) * 1000
+
+        write_started = time.perf_counter()
+        await db.run_async(db.store_chunks, pending_chunks, embeddings)
+        write_ms = (time.perf_counter() - write_started) * 1000
+
+    await db.run_async(db.mark_user_indexed, user_id)
+
+    if stats is not None:
+        elapsed = time.perf_counter() - started
+        stats.update({
+            "chunks": len(pending_chunks),
+            "chunks_per_sec": round(len(pending_chunks) / elapsed, 2) if elapsed > 0 else 0.0,
+            "encode_ms": round(encode_ms, 2),
+            "write_ms": round(write_ms, 2),
+        })
+    return [chunk["chunk_id"] for chunk in pending_chunks]
+
+async def index_profile_from_db(user_id: str) -> Dict[str, Any]:
+    """
+    Brings the profile index of a user up to date and returns the indexing stats.
+
+    Only fields whose fingerprint changed (or that are new) are re-chunked and
+    re-embedded. Their new chunks are written before the old ones are removed,
+    and fields that disappeared from the profile are deleted.
+    """
+    profile_data = await db.run_async(db.get_profile_by_id, user_id)
     if not profile_data:
         raise ValueError(f"Profile with user_id '{user_id}' not found in the database.")
 
+    stats = _empty_index_stats()
     text_fields = chunking.extract_text_fields(profile_data)
-    if not text_fields:
-        db.mark_user_indexed(user_id)
-        return 0
-    chunk_ids = await process_and_store_text_chunks(
-        user_id=user_id,
-        namespace="profile",
-        text_items=text_fields
-    )
-    
-    return len(chunk_ids)
+    indexed = await db.run_async(db.get_field_fingerprints, user_id, namespace="profile")
+
+    current_keys = set()
+    changed_fields = []
+    for source_type, source_id, text in text_fields:
+        key = field_key(source_type, source_id)
+        current_keys.add(key)
+        if indexed.get(key) != field_fingerprint(text):
+            changed_fields.append((source_type, source_id, text))
+
+    changed_keys = [field_key(source_type, source_id) for source_type, source_id, _ in changed_fields]
+    removed_keys = [key for key in indexed if key not in current_keys]
+    stats["fields_changed"] = len(changed_fields)
+    stats["fields_unchanged"] = len(text_fields) - len(changed_fields)
+    stats["fields_removed"] = len(removed_keys)
+
+    new_chunk_ids = []
+    if changed_fields:
+        new_chunk_ids = await process_and_store_text_chunks(
+            user_id=user_id,
+            namespace="profile",
+            text_items=changed_fields,
+            stats=stats,
+            fingerprint_fields=True
+        )
+    elif not await db.run_async(db.get_user_index_status, user_id):
+        # Re-stamping an already indexed user would needlessly expire their cached search results.
+        await db.run_async(db.mark_user_indexed, user_id)
+
+    stale_keys = [key for key in changed_keys if key in indexed] + removed_keys
+    await db.run_async(db.delete_field_chunks, user_id, "profile", stale_keys, keep_chunk_ids=new_chunk_ids)
+    return stats
+
+async def _index_profile_until_clean(user_id: str) -> Dict[str, Any]:
+    """Runs indexing passes until no caller asked for a fresh index during the last one."""
+    while True:
+        _rerun_requested.discard(user_id)
+        stats = await index_profile_from_db(user_id)
+        if user_id not in _rerun_requested:
+            return stats
+        logger.info(f"Profile of user '{user_id}' may have changed during indexing; running one more pass")
+
+async def index_profile_single_flight(user_id: str, fresh: bool = True) -> Dict[str, Any]:
+    """
+    Indexes a user's profile, joining the in-progress run if one exists, so that
+    concurrent callers share one indexing pass instead of racing each other.
+
+    The run in progress may have read the profile before the caller's edit. With
+    `fresh`, joining it schedules one more pass once it finishes, and the caller
+    gets the result of that pass; callers that arrive meanwhile share it too.
+    """
+    task = _indexing_tasks.get(user_id)
+    if task is None or task.done():
+        _rerun_requested.discard(user_id)
+        task = asyncio.create_task(_index_profile_until_clean(user_id))
+        _indexing_tasks[user_id] = task
+        task.add_done_callback(
+            lambda done: _indexing_tasks.pop(user_id, None) if _indexing_tasks.get(user_id) is done else None
+        )
+    else:
+        logger.info(f"Joining in-progress indexing for user '{user_id}'")
+        if fresh:
+            _rerun_requested.add(user_id)
+    # Shield the shared task so one cancelled caller does not abort it for the others.
+    return await asyncio.shield(task)
+
+async def ensure_user_indexed(user_id: str) -> bool:
+    """Indexes the user's profile if it has never been indexed. Returns True if indexing ran."""
+    if await db.run_async(db.get_user_index_status, user_id):
+        return False
+    # Any complete index will do here, so joining a run in progress does not force another pass.
+    await index_profile_single_flight(user_id, fresh=False)
+    return True
 
 async def index_resume_section(user_id: str, section_id: str, text: str) -> List[str]:
-    db.delete_chunks_by_section_id(user_id, section_id)
-    text_item = [("user_edited", section_id, text)]
-    chunk_ids = await process_and_store_text_chunks(
-        user_id=user_id,
-        namespace="resume_sections",
-        text_items=text_item,
-        section_id=section_id
-    )
-    return chunk_ids
\ No newline at end of file
+    """
+    Replaces the chunks of a resume section. Chunk ids are content-addressed, so
+    unchanged chunks are not re-encoded and an unchanged section writes nothing.
+    New chunks are written and stale ones deleted in one transaction, so readers
+    never see the section empty or half replaced.
+    """
+    key = (user_id, section_id)
+    entry = _section_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            return await _replace_resume_section(user_id, section_id, text)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _section_locks.pop(key, None)
+
+async def _replace_resume_section(user_id: str, section_id: str, text: str) -> List[str]:
+    namespace = "resume_sections"
+    all_chunks = build_pending_chunks(user_id, namespace, [("user_edited", section_id, text)], section_id)
+    chunk_ids = [chunk["chunk_id"] for chunk in all_chunks]
+    for attempt in range(SECTION_REPLACE_ATTEMPTS):
+        existing_chunk_ids = await db.run_async(db.get_section_chunk_ids, user_id, namespace, section_id)
+        if existing_chunk_ids == set(chunk_ids):
+            return chunk_ids
+
+        pending_chunks = [chunk for chunk in all_chunks if chunk["chunk_id"] not in existing_chunk_ids]
+        embeddings = await model.embed_text_async([chunk["text"] for chunk in pending_chunks]) if pending_chunks else []
+        try:
+            await db.run_async(db.replace_section_chunks, user_id, namespace, section_id, chunk_ids, pending_chunks, embeddings)
+            return chunk_ids
+        except db.SectionChangedError:
+            # Another process replaced the section since it was read; start over from its result.
+            logger.info(f"Section '{section_id}' of user '{user_id}' changed concurrently (attempt {attempt + 1})")
+    raise RuntimeError(f"Section '{section_id}' of user '{user_id}' kept changing during replacement")
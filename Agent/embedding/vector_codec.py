@@ -0,0 +1,71 @@
+# embedding/vector_codec.py
+
+import base64
+from typing import Literal, Tuple, Any, Optional
+import numpy as np
+from bson.binary import Binary
+
+VectorEncoding = Literal['json', 'base64_f32', 'base64_f16']
+
+_DTYPES = {
+    'base64_f32': np.dtype('<f4'),
+    'base64_f16': np.dtype('<f2'),
+}
+
+def encode_vectors(vectors: np.ndarray, encoding: VectorEncoding) -> str:
+    """Encodes a vector or a row-major matrix of vectors as a little-endian base64 string."""
+    dtype = _DTYPES[encoding]
+    return base64.b64encode(np.ascontiguousarray(vectors, dtype=dtype).tobytes()).decode('ascii')
+
+def decode_vectors(data: str, encoding: VectorEncoding, dim: int) -> np.ndarray:
+    """Decodes a base64 string into a float32 array of shape (n, dim)."""
+    dtype = _DTYPES[encoding]
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except ValueError as e:
+        raise ValueError(f"Invalid base64 vector payload: {e}") from e
+    if len(raw) == 0 or len(raw) % (dtype.itemsize * dim) != 0:
+        raise ValueError(f"Vector payload of {len(raw)} bytes is not a whole number of {dim}-dimensional {encoding} vectors")
+    return np.frombuffer(raw, dtype=dtype).astype(np.float32).reshape(-1, dim)
+
+def vectors_to_bytes(vectors: np.ndarray) -> bytes:
+    """Raw little-endian float32 bytes, used for `application/octet-stream` responses."""
+    return np.ascontiguousarray(vectors, dtype=_DTYPES['base64_f32']).tobytes()
+
+# BSON binary vector (subtype 9) layout: a dtype byte, a padding byte, then the packed values.
+# Atlas Vector Search indexes this format directly.
+BSON_VECTOR_SUBTYPE = 9
+_BSON_FLOAT32 = 0x27
+_BSON_INT8 = 0x03
+
+StorageFormat = Literal['float32', 'int8', 'array']
+
+def to_bson_vector(vector: np.ndarray, storage_format: StorageFormat = 'float32') -> Tuple[Any, Optional[float]]:
+    """
+    Encodes a vector for the chunks collection. Returns the stored value and, for
+    int8 scalar quantization, the scale needed to reconstruct the floats.
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    if storage_format == 'array':
+        return vector.tolist(), None
+    if storage_format == 'int8':
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return Binary(bytes((_BSON_INT8, 0)) + quantized.tobytes(), BSON_VECTOR_SUBTYPE), scale
+    return Binary(bytes((_BSON_FLOAT32, 0)) + vector.astype('<f4').tobytes(), BSON_VECTOR_SUBTYPE), None
+
+def from_bson_vector(value: Any, scale: Optional[float] = None) -> np.ndarray:
+    """
+    Decodes a stored embedding into float32. Binary float32 vectors are returned as
+    a zero-copy, read-only view over the BSON bytes; legacy arrays are still accepted.
+    """
+    if isinstance(value, (bytes, Binary)):
+        dtype_code = value[0]
+        if dtype_code == _BSON_FLOAT32:
+            return np.frombuffer(value, dtype='<f4', offset=2)
+        if dtype_code == _BSON_INT8:
+            quantized = np.frombuffer(value, dtype=np.int8, offset=2)
+            return quantized.astype(np.float32) * np.float32(scale if scale is not None else 1.0)
+        raise ValueError(f"Unsupported BSON vector dtype 0x{dtype_code:02x}")
+    return np.asarray(value, dtype=np.float32)
@@ -0,0 +1,183 @@
+# embedding/vector_index.py
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, List, Optional, Dict, Any, Tuple, Union
+import numpy as np
+
+from .vector_codec import from_bson_vector
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ("_id", "user_id", "index_namespace", "section_id", "source_type", "source_id", "text", "created_at")
+
+class _Partition:
+    """The chunks of one (user_id, namespace) pair held as a dense float32 matrix."""
+
+    def __init__(self, documents: List[Dict[str, Any]], vectors: np.ndarray, ann_threshold: int, ann_ef: int):
+        self.documents = documents
+        self.section_ids = np.array([doc.get("section_id") for doc in documents], dtype=object)
+        self.matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.positions = {doc["_id"]: position for position, doc in enumerate(documents)}
+        self.stamp = None
+        self.ann = None
+        if hnswlib is not None and len(documents) >= ann_threshold:
+            self.ann = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+            self.ann.init_index(max_elements=len(documents), ef_construction=200, M=16)
+            self.ann.add_items(self.matrix, np.arange(len(documents)))
+            self.ann.set_ef(max(ann_ef, 1))
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: np.ndarray, top_k: int, section_ids: Optional[List[str]]) -> List[Tuple[int, float]]:
+        if section_ids:
+            candidates = np.flatnonzero(np.isin(self.section_ids, section_ids))
+        else:
+            candidates = None
+
+        if self.ann is not None and candidates is None:
+            k = min(top_k, len(self))
+            labels, distances = self.ann.knn_query(query, k=k)
+            # hnswlib's "ip" space returns 1 - dot product as the distance.
+            return [(int(i), float(1.0 - d)) for i, d in zip(labels[0], distances[0])]
+
+        if candidates is None:
+            scores = self.matrix @ query
+            positions = np.arange(len(self))
+        else:
+            if candidates.size == 0:
+                return []
+            scores = self.matrix[candidates] @ query
+            positions = candidates
+
+        k = min(top_k, scores.shape[0])
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(positions[i]), float(scores[i])) for i in top]
+
+class InMemoryVectorIndex:
+    """
+    Per-user, per-namespace vector index kept in process memory.
+
+    Partitions are loaded lazily from the chunks collection on first search and
+    dropped whenever a write touches them, so the next search reloads a fresh copy.
+    At most `max_partitions` are kept; loading one more evicts the least recently used.
+    Partitions with at least `ann_threshold` chunks also get an HNSW graph when
+    hnswlib is installed; smaller ones (and section-filtered queries) use an exact
+    vectorized dot product.
+    """
+
+    def __init__(self, ann_threshold: int = 5000, ann_ef: int = 64, max_partitions: int = 1024):
+        self.ann_threshold = ann_threshold
+        self.ann_ef = ann_ef
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[Tuple[str, str], _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, namespace: str, stamp: Any = None) -> Optional[_Partition]:
+        """Returns the loaded partition, or None when it is missing or was loaded under another index stamp."""
+        with self._lock:
+            partition = self._partitions.get((user_id, namespace))
+            if partition is None or partition.stamp != stamp:
+                return None
+            self._partitions.move_to_end((user_id, namespace))
+            return partition
+
+    def load(
+        self,
+        user_id: str,
+        namespace: str,
+        documents: List[Dict[str, Any]],
+        is_current: Optional[Callable[[], bool]] = None,
+        stamp: Any = None
+    ) -> _Partition:
+        """
+        Builds the partition for a user/namespace from chunk documents that include
+        their embedding and returns it. It is only kept for later searches if
+        `is_current()` still holds once it is built, so a partition read before a
+        concurrent write is never installed after that write's invalidation.
+        `stamp` is the user's persisted index stamp read before the documents were;
+        `get` ignores the partition once the stamp moves on.
+        """
+        metadata = []
+        vectors = []
+        for doc in documents:
+            vectors.append(from_bson_vector(doc["embedding"], doc.get("embedding_scale")))
+            metadata.append({field: doc.get(field) for field in RESULT_FIELDS})
+        if vectors:
+            matrix = np.vstack(vectors)
+            # Dequantized int8 rows are only approximately unit length; renormalize so dot products are cosines.
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms > 0, norms, 1.0)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        partition = _Partition(metadata, matrix, self.ann_threshold, self.ann_ef)
+        partition.stamp = stamp
+        with self._lock:
+            if is_current is not None and not is_current():
+                logger.debug(f"Discarded stale partition for user '{user_id}' namespace '{namespace}'")
+                return partition
+            self._partitions[(user_id, namespace)] = partition
+            self._partitions.move_to_end((user_id, namespace))
+            while len(self._partitions) > self.max_partitions:
+                evicted, _ = self._partitions.popitem(last=False)
+                logger.debug(f"Evicted partition for user '{evicted[0]}' namespace '{evicted[1]}'")
+        logger.debug(f"Loaded {len(metadata)} chunks for user '{user_id}' namespace '{namespace}' into memory")
+        return partition
+
+    def invalidate(self, user_id: str, namespace: Optional[str] = None) -> None:
+        """Drops the cached partition(s) of a user; all namespaces when `namespace` is None."""
+        with self._lock:
+            if namespace is not None:
+                self._partitions.pop((user_id, namespace), None)
+                return
+            for key in [key for key in self._partitions if key[0] == user_id]:
+                del self._partitions[key]
+
+    def vectors(self, user_id: str, namespace: str, chunk_ids: List[Any]) -> Optional[Dict[Any, np.ndarray]]:
+        """Returns the stored vectors of the given chunks, or None when the partition is not loaded."""
+        partition = self._partitions.get((user_id, namespace))
+        if partition is None:
+            return None
+        return {
+            chunk_id: partition.matrix[partition.positions[chunk_id]]
+            for chunk_id in chunk_ids if chunk_id in partition.positions
+        }
+
+    def search(
+        self,
+        user_id: str,
+        namespace: str,
+        query_vector: Union[List[float], np.ndarray],
+        top_k: int,
+        filter_by_section_ids: Optional[List[str]] = None,
+        partition: Optional[_Partition] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns the top_k chunks in the same shape as the Atlas `$vectorSearch` projection."""
+        if partition is None:
+            partition = self._partitions.get((user_id, namespace))
+        if partition is None or len(partition) == 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        results = []
+        for position, cosine in partition.search(query, top_k, filter_by_section_ids):
+            result = dict(partition.documents[position])
+            # Atlas reports cosine similarity rescaled to [0, 1]; keep scores comparable.
+            result["score"] = (1.0 + cosine) / 2.0
+            results.append(result)
+        return results
@@ -13,6 +13,7 @@ from .schemas import FullGenerateRequest, SectionGenerateRequest, GenerateRespon
 from .utils import retrieve_full_context, retrieve_section_context, format_context_for_prompt
 from .prompt_templates import FULL_RESUME_TEMPLATE, SECTION_REWRITE_TEMPLATE
 from .llm_client import invoke_gemini, LLMError
+from common.instrumentation import instrument_app
 
 load_dotenv()
 
@@ -31,6 +32,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await http_client.aclose()
 
 app = FastAPI(title="Generator Service", version="1.0.0", lifespan=lifespan)
+instrument_app(app, "generator")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 def get_http_client() -> httpx.AsyncClient:
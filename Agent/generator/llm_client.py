@@ -1,6 +1,7 @@
 import logging
 import os
 import httpx
+from common.instrumentation import track
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +32,9 @@ async def invoke_gemini(client: httpx.AsyncClient, prompt: str) -> str:
     logger.info(f"Invoking Gemini API with model {model}")
     
     try:
-        response = await client.post(url, json=payload, headers=headers, timeout=60.0)
-        response.raise_for_status()
+        async with track("gemini", "generate_content"):
+            response = await client.post(url, json=payload, headers=headers, timeout=60.0)
+            response.raise_for_status()
         response_data = response.json()
         
         generated_text = response_data["candidates"][0]["content"]["parts"][0]["text"]
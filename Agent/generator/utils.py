@@ -2,6 +2,7 @@ import logging
 import os
 from typing import List, Optional
 import httpx
+from common.instrumentation import track
 from .schemas import ChunkItem, RetrieveResponse
 
 logger = logging.getLogger(__name__)
@@ -21,11 +22,12 @@ async def retrieve_full_context(
     }
 
     logger.info(f"Retrieving full context for user {user_id} from {endpoint}")
-    response = await client.post(endpoint, json=payload, timeout=30.0)
-    response.raise_for_status()
+    async with track("retrieval_service", "retrieve_full"):
+        response = await client.post(endpoint, json=payload, timeout=30.0)
+        response.raise_for_status()
     
-    result = response.json()
-    return [ChunkItem(**item) for item in result.get("results", [])]
+    # Validated once, straight from the response bytes.
+    return RetrieveResponse.model_validate_json(response.content).results
 
 async def retrieve_section_context(
     client: httpx.AsyncClient,
@@ -49,11 +51,11 @@ async def retrieve_section_context(
     logger.info(
         f"Retrieving section context for user {user_id}, section {section_id} from {endpoint}"
     )
-    response = await client.post(endpoint, json=payload, timeout=30.0)
-    response.raise_for_status()
-    
-    result = response.json()
-    chunks = [ChunkItem(**item) for item in result.get("results", [])]
+    async with track("retrieval_service", "retrieve_section"):
+        response = await client.post(endpoint, json=payload, timeout=30.0)
+        response.raise_for_status()
+
+    chunks = RetrieveResponse.model_validate_json(response.content).results
     logger.info(f"Successfully retrieved {len(chunks)} chunks for section context")
     return chunks
 
@@ -1,11 +1,16 @@
 # orchestrator/agent.py
 
 import os
+import time
+from typing import Any, Dict
+from uuid import UUID
 from langchain.agents import AgentExecutor
 from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
 from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.callbacks import BaseCallbackHandler
+from common.instrumentation import observe_downstream
 # --- FIX: Remove the import for ConversationBufferWindowMemory ---
 # from langchain.memory import ConversationBufferWindowMemory
 
@@ -28,11 +33,34 @@ You have access to the user's request, the full job description, and the user's
 4.  **Respond Clearly:** Always provide a clear, conversational response to the user summarizing what you did based on the tool's output.
 """
 
+class LLMLatencyCallback(BaseCallbackHandler):
+    """Records every Gemini call the agent makes as a downstream call in /metrics."""
+
+    def __init__(self):
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+    def _finish(self, run_id: UUID, outcome: str) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            observe_downstream("gemini", "agent_chat", time.perf_counter() - started, outcome)
+
 def create_agent_executor(toolbox: ToolBox, session_id: str) -> AgentExecutor:
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     if not gemini_api_key: raise ValueError("GEMINI_API_KEY environment variable is required")
     
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=gemini_api_key, temperature=0.0, convert_system_message_to_human=True)
+    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=gemini_api_key, temperature=0.0, convert_system_message_to_human=True, callbacks=[LLMLatencyCallback()])
     
     tools = [
         toolbox.create_and_score_full_resume_tool,
@@ -2,6 +2,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
 import os
 import traceback
 from contextlib import asynccontextmanager
@@ -11,10 +12,13 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .schemas import ChatRequest, ChatResponse, HealthResponse
 from .agent import create_agent_executor
-from .tools import ToolBox
+from .tools import ToolBox, warm_up_scoring
 from .memory import get_session_context, initialize_session_context, get_session_history
+from common.instrumentation import instrument_app, track
 
 http_client: httpx.AsyncClient = None
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight.
+background_tasks: set = set()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -24,6 +28,7 @@ async def lifespan(app: FastAPI):
     await http_client.aclose()
 
 app = FastAPI(title="Orchestrator Agent Service", version="1.3.0-final", lifespan=lifespan)
+instrument_app(app, "orchestrator")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 def get_http_client() -> httpx.AsyncClient:
@@ -37,6 +42,10 @@ async def chat_endpoint(request: ChatRequest, client: httpx.AsyncClient = Depend
             if not request.user_id or not request.job_description:
                 raise HTTPException(status.HTTP_400_BAD_REQUEST, "For a new session, `user_id` and `job_description` are required.")
             session_context = initialize_session_context(request.session_id, request.user_id, request.job_description)
+            # The job description embedding is ready by the time the agent first scores a resume.
+            task = asyncio.create_task(warm_up_scoring(client, request.job_description))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
 
         toolbox = ToolBox(client=client, session_id=request.session_id)
         agent_executor = create_agent_executor(toolbox, request.session_id)
@@ -53,8 +62,9 @@ async def chat_endpoint(request: ChatRequest, client: httpx.AsyncClient = Depend
         
         # --- FIX: Manually save the conversation turn to Redis history ---
         chat_history = get_session_history(request.session_id)
-        chat_history.add_user_message(request.user_message)
-        chat_history.add_ai_message(agent_response)
+        with track("redis", "append_history"):
+            chat_history.add_user_message(request.user_message)
+            chat_history.add_ai_message(agent_response)
         
         final_context = get_session_context(request.session_id)
         
@@ -5,6 +5,7 @@ import os
 from typing import Dict, Any, Optional
 import redis
 from langchain_community.chat_message_histories import RedisChatMessageHistory
+from common.instrumentation import track
 
 # Initialize the Redis client from the environment variable.
 # This client is used for storing session context (user_id, jd, resume_state).
@@ -43,7 +44,8 @@ def get_session_context(session_id: str) -> Optional[Dict[str, Any]]:
         A dictionary containing the session context if it exists, otherwise None.
     """
     key = f"session_context:{session_id}"
-    data = redis_client.get(key)
+    with track("redis", "get"):
+        data = redis_client.get(key)
     return json.loads(data) if data else None
 
 def update_session_context(session_id: str, context_data: Dict[str, Any]) -> None:
@@ -58,7 +60,8 @@ def update_session_context(session_id: str, context_data: Dict[str, Any]) -> Non
         context_data: The complete dictionary of session data to be saved.
     """
     key = f"session_context:{session_id}"
-    redis_client.set(key, json.dumps(context_data))
+    with track("redis", "set"):
+        redis_client.set(key, json.dumps(context_data))
 
 def initialize_session_context(session_id: str, user_id: str, job_description: str) -> Dict[str, Any]:
     """
@@ -7,6 +7,7 @@ import httpx
 from langchain.tools import tool
 from pydantic import ValidationError
 
+from common.instrumentation import track
 from .memory import get_session_context, update_session_context
 from .schemas import RetrieveResponse, GenerateResponse, ScoreResponse, SuggestionResponse, ChunkItem
 
@@ -21,6 +22,16 @@ def format_context_for_prompt(chunks: List[ChunkItem]) -> str:
     formatted_strings = [f"- From {c.index_namespace} ({c.source_type}): {c.text.strip()}" for c in chunks]
     return "\n".join(formatted_strings)
 
+async def warm_up_scoring(client: httpx.AsyncClient, job_description: str) -> None:
+    """Asks the scoring service to precompute the session's job description embedding. Best effort."""
+    endpoint = f"{SCORING_SERVICE_URL.rstrip('/')}/warmup"
+    try:
+        async with track("scoring_service", "warmup"):
+            response = await client.post(endpoint, json={"job_description": job_description}, timeout=30.0)
+            response.raise_for_status()
+    except Exception as e:
+        print(f"Scoring warm-up failed, the first score will encode the job description: {e}")
+
 class ToolBox:
     """A container for agent tools that shares the HTTP client and session_id."""
     def __init__(self, client: httpx.AsyncClient, session_id: str):
@@ -44,8 +55,9 @@ class ToolBox:
         try:
             gen_endpoint = f"{GENERATION_SERVICE_URL.rstrip('/')}/generate/full"
             gen_payload = {"user_id": context_data["user_id"], "job_description": context_data["job_description"]}
-            gen_response = await self.http_client.post(gen_endpoint, json=gen_payload, timeout=90.0)
-            gen_response.raise_for_status()
+            async with track("generator_service", "generate_full"):
+                gen_response = await self.http_client.post(gen_endpoint, json=gen_payload, timeout=90.0)
+                gen_response.raise_for_status()
             generated_json_text = GenerateResponse(**gen_response.json()).generated_text
             generated_content = json.loads(generated_json_text)
         except Exception as e:
@@ -64,8 +76,9 @@ class ToolBox:
         try:
             score_endpoint = f"{SCORING_SERVICE_URL.rstrip('/')}/score"
             score_payload = {"job_description": context_data["job_description"], "resume_text": full_resume_text}
-            score_response = await self.http_client.post(score_endpoint, json=score_payload, timeout=45.0)
-            score_response.raise_for_status()
+            async with track("scoring_service", "score"):
+                score_response = await self.http_client.post(score_endpoint, json=score_payload, timeout=45.0)
+                score_response.raise_for_status()
             score_data = ScoreResponse(**score_response.json())
         except Exception as e:
             return f"Error: Generated the resume but failed during the scoring step. Details: {e}"
@@ -85,8 +98,9 @@ class ToolBox:
         endpoint = f"{SCORING_SERVICE_URL.rstrip('/')}/score"
         payload = {"job_description": context["job_description"], "resume_text": resume_text}
         try:
-            response = await self.http_client.post(endpoint, json=payload)
-            response.raise_for_status()
+            async with track("scoring_service", "score"):
+                response = await self.http_client.post(endpoint, json=payload)
+                response.raise_for_status()
             score_data = ScoreResponse(**response.json())
             return f"Scoring Result: Final Score = {score_data.final_score:.2f}, Missing Keywords = {score_data.missing_keywords}"
         except Exception as e: return f"Error scoring text: {e}"
@@ -97,8 +111,9 @@ class ToolBox:
         endpoint = f"{SCORING_SERVICE_URL.rstrip('/')}/suggest"
         payload = {"missing_keywords": missing_keywords}
         try:
-            response = await self.http_client.post(endpoint, json=payload)
-            response.raise_for_status()
+            async with track("scoring_service", "suggest"):
+                response = await self.http_client.post(endpoint, json=payload)
+                response.raise_for_status()
             suggestions = SuggestionResponse(**response.json()).suggestions
             if not suggestions: return "No specific suggestions were generated."
             return "Here are some suggestions for improvement:\n- " + "\n- ".join(suggestions)
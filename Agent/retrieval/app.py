@@ -12,10 +12,20 @@ from dotenv import load_dotenv
 from .schemas import (
     FullRetrieveRequest,
     SectionRetrieveRequest,
+    SectionsRetrieveRequest,
     RetrieveResponse,
+    SectionsRetrieveResponse,
     HealthResponse,
 )
-from .utils import embed_text, retrieve_profile_chunks, retrieve_section_chunks
+from common.serialization import RawJSONResponse
+from common.instrumentation import instrument_app
+from .utils import (
+    retrieve_profile_chunks,
+    retrieve_section_chunks,
+    retrieve_sections_chunks,
+    query_embedding_cache,
+    request_stats,
+)
 
 load_dotenv()
 
@@ -28,11 +38,14 @@ logger = logging.getLogger(__name__)
 
 app_state: Dict[str, Any] = {}
 
+SECTIONS_FANOUT_CONCURRENCY = int(os.getenv("SECTIONS_FANOUT_CONCURRENCY", "4"))
+
 app = FastAPI(
     title="CVisionary Retrieval Service",
     description="Context retrieval service for resume generation and editing",
     version="1.1.0",
 )
+instrument_app(app, "retrieval")
 
 app.add_middleware(
     CORSMiddleware,
@@ -80,32 +93,59 @@ async def log_requests(request: Request, call_next):
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    return HealthResponse(status="ok", service="retrieval")
+    return HealthResponse(
+        status="ok",
+        service="retrieval",
+        query_embedding_cache=query_embedding_cache.stats(),
+        downstream_requests=request_stats.stats(),
+    )
 
 @app.post("/retrieve/full", response_model=RetrieveResponse)
 async def retrieve_full_context(
     request: FullRetrieveRequest, client: httpx.AsyncClient = Depends(get_http_client)
 ):
     logger.info(f"Full context retrieval for user_id={request.user_id}")
-    embedding = await embed_text(client, request.job_description)
-    chunks = await retrieve_profile_chunks(
-        client, user_id=request.user_id, embedding=embedding, top_k=request.top_k
+    body = await retrieve_profile_chunks(
+        client,
+        user_id=request.user_id,
+        query_text=request.job_description,
+        top_k=request.top_k,
+        search_mode=request.search_mode,
     )
-    logger.info(f"Full context retrieval complete: retrieved {len(chunks)} chunks")
-    return RetrieveResponse(results=chunks)
+    logger.info(f"Full context retrieval complete: forwarded {len(body)} bytes")
+    return RawJSONResponse(body)
 
 @app.post("/retrieve/section", response_model=RetrieveResponse)
 async def retrieve_section_context(
     request: SectionRetrieveRequest, client: httpx.AsyncClient = Depends(get_http_client)
 ):
     logger.info(f"Section context retrieval for user_id={request.user_id}, section_id={request.section_id}")
-    embedding = await embed_text(client, request.job_description)
-    chunks = await retrieve_section_chunks(
+    body = await retrieve_section_chunks(
         client,
         user_id=request.user_id,
         section_id=request.section_id,
-        embedding=embedding,
+        query_text=request.job_description,
+        top_k=request.top_k,
+        search_mode=request.search_mode,
+    )
+    logger.info(f"Section context retrieval complete: forwarded {len(body)} bytes")
+    return RawJSONResponse(body)
+
+@app.post("/retrieve/sections", response_model=SectionsRetrieveResponse)
+async def retrieve_sections_context(
+    request: SectionsRetrieveRequest, client: httpx.AsyncClient = Depends(get_http_client)
+):
+    section_ids = list(dict.fromkeys(request.section_ids))
+    logger.info(f"Multi-section context retrieval for user_id={request.user_id}, {len(section_ids)} sections")
+    results = await retrieve_sections_chunks(
+        client,
+        user_id=request.user_id,
+        section_ids=section_ids,
+        query_text=request.job_description,
         top_k=request.top_k,
+        search_mode=request.search_mode,
+        max_concurrency=SECTIONS_FANOUT_CONCURRENCY,
     )
-    logger.info(f"Section context retrieval complete: retrieved {len(chunks)} chunks")
-    return RetrieveResponse(results=chunks)
\ No newline at end of file
+    total = sum(len(chunks) for chunks in results.values())
+    logger.info(f"Multi-section context retrieval complete: retrieved {total} chunks")
+    return RawJSONResponse({"results": results})
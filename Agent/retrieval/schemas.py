@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import List, Optional, Literal, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -12,6 +12,10 @@ class FullRetrieveRequest(BaseModel):
         ge=1,
         le=50,
     )
+    search_mode: Literal["vector", "hybrid"] = Field(
+        default_factory=lambda: os.getenv("RETRIEVAL_SEARCH_MODE", "vector"),
+        description="'hybrid' also ranks chunks by exact term matches (BM25) and fuses both rankings",
+    )
 
 class SectionRetrieveRequest(BaseModel):
     user_id: str = Field(..., description="User identifier for profile lookup", min_length=1)
@@ -23,6 +27,25 @@ class SectionRetrieveRequest(BaseModel):
         ge=1,
         le=50,
     )
+    search_mode: Literal["vector", "hybrid"] = Field(
+        default_factory=lambda: os.getenv("RETRIEVAL_SEARCH_MODE", "vector"),
+        description="'hybrid' also ranks chunks by exact term matches (BM25) and fuses both rankings",
+    )
+
+class SectionsRetrieveRequest(BaseModel):
+    user_id: str = Field(..., description="User identifier for profile lookup", min_length=1)
+    section_ids: List[str] = Field(..., description="Resume section identifiers", min_length=1, max_length=50)
+    job_description: str = Field(..., description="Job posting text for relevance matching", min_length=1)
+    top_k: int = Field(
+        default_factory=lambda: int(os.getenv("DEFAULT_TOP_K", "5")),
+        description="Number of chunks to retrieve per section",
+        ge=1,
+        le=50,
+    )
+    search_mode: Literal["vector", "hybrid"] = Field(
+        default_factory=lambda: os.getenv("RETRIEVAL_SEARCH_MODE", "vector"),
+        description="'hybrid' also ranks chunks by exact term matches (BM25) and fuses both rankings",
+    )
 
 class ChunkItem(BaseModel):
     chunk_id: str
@@ -40,6 +63,13 @@ class RetrieveResponse(BaseModel):
         ..., description="List of retrieved chunks ordered by relevance score (descending)"
     )
 
+class SectionsRetrieveResponse(BaseModel):
+    results: Dict[str, List[ChunkItem]] = Field(
+        ..., description="Retrieved chunks per section_id, each list ordered by relevance score (descending)"
+    )
+
 class HealthResponse(BaseModel):
     status: str
-    service: str
\ No newline at end of file
+    service: str
+    query_embedding_cache: Optional[Dict[str, Any]] = None
+    downstream_requests: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -1,99 +1,336 @@
 import asyncio
+import hashlib
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import random
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Awaitable, Callable, Tuple, Deque
 
 import httpx
 from fastapi import HTTPException
 
-from .schemas import ChunkItem
+from common.serialization import loads
+from common.instrumentation import track
 
 logger = logging.getLogger(__name__)
 
-RETRY_DELAY = 1.0
 MAX_RETRIES = 2
+# Full-jitter exponential backoff: sleep uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)).
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "2.0"))
+# Total time one downstream call may take across all attempts; each attempt gets a share of what is left.
+REQUEST_BUDGET_SECONDS = float(os.getenv("EMBEDDING_REQUEST_BUDGET_SECONDS", "30"))
+# Hedging: when an idempotent call has not answered within its recent p95 latency, send a second copy.
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.02"))
+HEDGE_MIN_SAMPLES = 20
 
-async def embed_text(client: httpx.AsyncClient, job_description: str) -> List[float]:
+# Vectors travel between the services as base64 little-endian float32 instead of JSON float lists.
+VECTOR_ENCODING = "base64_f32"
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of query embeddings with a TTL, keyed by a hash of the query text.
+
+    Concurrent lookups of the same key share one in-flight computation, so a
+    burst of requests for one job description costs a single /embed call.
+    Failures are not cached.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Task[str]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(self, text: str, compute: Callable[[], Awaitable[str]]) -> str:
+        key = self.key(text)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        # Shield the shared task so one cancelled caller does not abort it for the others.
+        return await asyncio.shield(task)
+
+    def _store(self, key: str, task: "asyncio.Task[str]") -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.shared
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_in_flight": self.shared,
+            "hit_rate": round((self.hits + self.shared) / lookups, 4) if lookups else 0.0,
+        }
+
+class LatencyTracker:
+    """Recent successful latencies per downstream call, used to time hedged requests."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, key: str, seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, key: str, q: float) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p95_ms": {
+                key: round(p95 * 1000, 1)
+                for key in self._samples
+                if (p95 := self.quantile(key, 0.95)) is not None
+            },
+        }
+
+request_stats = LatencyTracker()
+
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "900")),
+)
+
+async def embed_text(client: httpx.AsyncClient, job_description: str) -> str:
+    """Returns the base64 query embedding, served from the query embedding cache when possible."""
+    return await query_embedding_cache.get_or_compute(
+        job_description, lambda: _request_embedding(client, job_description)
+    )
+
+async def _request_embedding(client: httpx.AsyncClient, job_description: str) -> str:
     embedding_service_url = os.getenv("EMBEDDING_SERVICE_URL")
     if not embedding_service_url:
         raise HTTPException(status_code=500, detail="Embedding service URL not configured")
 
     url = f"{embedding_service_url.rstrip('/')}/embed"
-    payload = {"text": job_description}
+    payload = {"text": job_description, "encoding": VECTOR_ENCODING}
     logger.debug(f"POST {url}")
 
     try:
-        response = await _make_request_with_retry(client, "POST", url, json=payload)
-        if "embedding" not in response:
+        response = (await _make_request_with_retry(client, "POST", url, hedge_key="embed", json=payload)).json()
+        if not response.get("embedding_b64"):
             raise HTTPException(status_code=502, detail="Invalid response format from embedding service")
-        return response["embedding"]
+        return response["embedding_b64"]
     except Exception as e:
         logger.error(f"embed_text failed: {str(e)}")
         raise HTTPException(status_code=502, detail=f"Failed to generate embedding: {e}")
 
 async def retrieve_profile_chunks(
-    client: httpx.AsyncClient, user_id: str, embedding: List[float], top_k: int
-) -> List[ChunkItem]:
+    client: httpx.AsyncClient, user_id: str, query_text: str, top_k: int, search_mode: str = "vector"
+) -> bytes:
+    """Returns the embedding service's JSON response body as-is, ready to be forwarded without re-parsing."""
     embedding_service_url = os.getenv("EMBEDDING_SERVICE_URL")
     if not embedding_service_url:
         raise HTTPException(status_code=500, detail="Embedding service URL not configured")
 
-    url = f"{embedding_service_url.rstrip('/')}/retrieve/{user_id}"
+    # The embedding service encodes the query itself, so there is no separate /embed round trip.
+    url = f"{embedding_service_url.rstrip('/')}/retrieve/{user_id}/text"
     payload = {
-        "query_embedding": embedding,
+        "query_text": query_text,
         "top_k": top_k,
         "index_namespace": "profile",
+        "search_mode": search_mode,
     }
     logger.debug(f"POST {url}")
 
     try:
-        response = await _make_request_with_retry(client, "POST", url, json=payload)
-        return _parse_chunks_response(response, user_id)
+        response = await _make_request_with_retry(client, "POST", url, hedge_key="retrieve_text", json=payload)
+        return response.content
     except Exception as e:
         logger.error(f"retrieve_profile_chunks failed: {str(e)}")
         raise HTTPException(status_code=502, detail=f"Failed to retrieve profile chunks: {e}")
 
 async def retrieve_section_chunks(
-    client: httpx.AsyncClient, user_id: str, section_id: str, embedding: List[float], top_k: int
-) -> List[ChunkItem]:
+    client: httpx.AsyncClient, user_id: str, section_id: str, query_text: str, top_k: int,
+    search_mode: str = "vector"
+) -> bytes:
+    """Returns the embedding service's JSON response body as-is, ready to be forwarded without re-parsing."""
     embedding_service_url = os.getenv("EMBEDDING_SERVICE_URL")
     if not embedding_service_url:
         raise HTTPException(status_code=500, detail="Embedding service URL not configured")
 
-    url = f"{embedding_service_url.rstrip('/')}/retrieve/{user_id}"
+    url = f"{embedding_service_url.rstrip('/')}/retrieve/{user_id}/text"
     payload = {
-        "query_embedding": embedding,
+        "query_text": query_text,
         "top_k": top_k,
         "index_namespace": "resume_sections",
         "filter_by_section_ids": [section_id],
+        "search_mode": search_mode,
     }
     logger.debug(f"POST {url}")
 
     try:
-        response = await _make_request_with_retry(client, "POST", url, json=payload)
-        return _parse_chunks_response(response, user_id, section_id)
+        response = await _make_request_with_retry(client, "POST", url, hedge_key="retrieve_text", json=payload)
+        return response.content
     except Exception as e:
         logger.error(f"retrieve_section_chunks failed: {str(e)}")
         raise HTTPException(status_code=502, detail=f"Failed to retrieve section chunks: {e}")
 
+async def retrieve_sections_chunks(
+    client: httpx.AsyncClient, user_id: str, section_ids: List[str], query_text: str, top_k: int,
+    search_mode: str = "vector", max_concurrency: int = 4
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Retrieves chunks for several resume sections. The query is embedded once (through
+    the query embedding cache) and the per-section searches run concurrently, at most
+    `max_concurrency` at a time. Results are keyed by section id in request order.
+    """
+    embedding_service_url = os.getenv("EMBEDDING_SERVICE_URL")
+    if not embedding_service_url:
+        raise HTTPException(status_code=500, detail="Embedding service URL not configured")
+
+    embedding = await embed_text(client, query_text)
+    url = f"{embedding_service_url.rstrip('/')}/retrieve/{user_id}"
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def retrieve_one(section_id: str) -> List[Dict[str, Any]]:
+        payload = {
+            "query_embedding_b64": embedding,
+            "query_encoding": VECTOR_ENCODING,
+            "top_k": top_k,
+            "index_namespace": "resume_sections",
+            "filter_by_section_ids": [section_id],
+            "search_mode": search_mode,
+        }
+        if search_mode == "hybrid":
+            payload["query_text"] = query_text
+        async with semaphore:
+            logger.debug(f"POST {url} (section_id={section_id})")
+            response = await _make_request_with_retry(client, "POST", url, hedge_key="retrieve", json=payload)
+        return _parse_chunks_response(response.content)
+
+    try:
+        results = await asyncio.gather(*(retrieve_one(section_id) for section_id in section_ids))
+        return dict(zip(section_ids, results))
+    except Exception as e:
+        logger.error(f"retrieve_sections_chunks failed: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to retrieve section chunks: {e}")
+
+async def _send(
+    client: httpx.AsyncClient, method: str, url: str, timeout: float, latency_key: Optional[str], **kwargs
+) -> httpx.Response:
+    started = time.perf_counter()
+    async with track("embedding_service", latency_key or method.lower()):
+        response = await asyncio.wait_for(client.request(method, url, timeout=timeout, **kwargs), timeout)
+        response.raise_for_status()
+    if latency_key is not None:
+        request_stats.record(latency_key, time.perf_counter() - started)
+    return response
+
+async def _send_hedged(
+    client: httpx.AsyncClient, method: str, url: str, timeout: float, hedge_key: str, **kwargs
+) -> httpx.Response:
+    """
+    Sends the request and, if it has not completed within the recent p95 latency of
+    `hedge_key`, a second identical request. The first success wins; the other is cancelled.
+    """
+    primary = asyncio.create_task(_send(client, method, url, timeout, hedge_key, **kwargs))
+    tasks = {primary}
+    try:
+        delay = request_stats.quantile(hedge_key, HEDGE_QUANTILE) if HEDGE_REQUESTS else None
+        if delay is not None:
+            delay = max(delay, HEDGE_MIN_DELAY)
+        if delay is None or delay >= timeout:
+            return await primary
+
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            logger.debug(f"Hedging {method} {url} after {delay * 1000:.0f} ms")
+            request_stats.hedges += 1
+            tasks.add(asyncio.create_task(_send(client, method, url, timeout - delay, hedge_key, **kwargs)))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        request_stats.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
 async def _make_request_with_retry(
-    client: httpx.AsyncClient, method: str, url: str, **kwargs
-) -> Dict[str, Any]:
+    client: httpx.AsyncClient, method: str, url: str, hedge_key: Optional[str] = None,
+    budget_seconds: Optional[float] = None, **kwargs
+) -> httpx.Response:
+    """
+    Calls the embedding service with jittered exponential backoff between attempts.
+    Each attempt's deadline is an equal share of the remaining budget, so retries can
+    never push the call past `budget_seconds`. Pass `hedge_key` only for idempotent
+    calls (/embed, /retrieve); it enables hedging and names the latency series used.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (budget_seconds or REQUEST_BUDGET_SECONDS)
     last_exception = None
     for attempt in range(MAX_RETRIES + 1):
-        try:
-            if attempt > 0:
-                logger.debug(f"Retry attempt {attempt} for {method} {url}")
-                await asyncio.sleep(RETRY_DELAY * attempt) # Exponential backoff
+        if attempt > 0:
+            backoff = random.uniform(0.0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            if loop.time() + backoff >= deadline:
+                break
+            logger.debug(f"Retry attempt {attempt} for {method} {url} in {backoff:.2f}s")
+            request_stats.retries += 1
+            await asyncio.sleep(backoff)
 
-            response = await client.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response.json()
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        attempt_timeout = remaining / (MAX_RETRIES + 1 - attempt)
+        try:
+            if hedge_key is not None:
+                return await _send_hedged(client, method, url, attempt_timeout, hedge_key, **kwargs)
+            return await _send(client, method, url, attempt_timeout, None, **kwargs)
 
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 raise HTTPException(status_code=404, detail="User not found or no chunks available") from e
-            elif e.response.status_code >= 500:
+            elif e.response.status_code >= 500 or e.response.status_code == 429:
                 error_msg = f"Embedding service server error: {e.response.status_code}"
                 logger.warning(f"Server error (attempt {attempt + 1}): {error_msg}")
                 last_exception = HTTPException(status_code=502, detail=error_msg)
@@ -101,7 +338,7 @@ async def _make_request_with_retry(
             else:
                 raise HTTPException(status_code=502, detail=f"Embedding service client error: {e.response.text}") from e
 
-        except (httpx.TimeoutException, httpx.ConnectError) as e:
+        except (httpx.TimeoutException, httpx.ConnectError, asyncio.TimeoutError) as e:
             error_msg = f"Network error connecting to embedding service: {type(e).__name__}"
             logger.warning(f"Network error (attempt {attempt + 1}): {error_msg}")
             last_exception = HTTPException(status_code=502, detail=error_msg)
@@ -109,12 +346,9 @@ async def _make_request_with_retry(
 
     raise last_exception or HTTPException(status_code=502, detail="Failed to connect to embedding service after retries")
 
-def _parse_chunks_response(
-    response: Dict[str, Any], user_id: str, section_id: Optional[str] = None
-) -> List[ChunkItem]:
+def _parse_chunks_response(body: bytes) -> List[Dict[str, Any]]:
+    """Decodes a /retrieve response body into plain chunk dicts; they are validated once, by the final consumer."""
+    response = loads(body)
     if "results" not in response or not isinstance(response["results"], list):
         raise HTTPException(status_code=502, detail="Invalid response format from embedding service: missing 'results' list")
-
-    chunks = [ChunkItem(**chunk_data) for chunk_data in response["results"]]
-    logger.debug(f"Parsed {len(chunks)} valid chunks from {len(response['results'])} total")
-    return chunks
\ No newline at end of file
+    return response["results"]
@@ -1,15 +1,22 @@
+import asyncio
 import os
 import logging
+from typing import List
 from contextlib import asynccontextmanager
 import httpx
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from .model_inference import ModelInference
 from .feature_extractor import extract_required_keywords, identify_missing_keywords
 from .suggestion_client import generate_suggestions
-from .schemas import ScoreRequest, ScoreResponse, SuggestionRequest, SuggestionResponse, HealthResponse
+from .schemas import (
+    ScoreRequest, ScoreResponse, BatchScoreRequest, BatchScoreResponse, RankedScore,
+    SuggestionRequest, SuggestionResponse, HealthResponse, WarmupRequest, WarmupResponse
+)
 from .llm_client import LLMError
+from common.instrumentation import instrument_app
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -31,6 +38,7 @@ async def lifespan(app: FastAPI):
     logger.info("Scoring Service shut down.")
 
 app = FastAPI(title="CVisionary ATS Scoring Service", version="1.2.0", lifespan=lifespan)
+instrument_app(app, "scoring")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 def get_http_client() -> httpx.AsyncClient:
@@ -39,9 +47,42 @@ def get_http_client() -> httpx.AsyncClient:
 def get_model_inference() -> ModelInference:
     return app_state["model_inference"]
 
+def build_score(semantic_score: float, required_keywords: List[str], resume_text: str) -> ScoreResponse:
+    """Combines the semantic score with keyword coverage into the weighted ATS score."""
+    if not required_keywords:
+        keyword_score = 1.0
+        missing_keywords = []
+    else:
+        missing_keywords = identify_missing_keywords(required_keywords, resume_text)
+        keyword_score = (len(required_keywords) - len(missing_keywords)) / len(required_keywords)
+
+    final_score = (semantic_score * 0.4) + (keyword_score * 0.6)
+
+    return ScoreResponse(
+        final_score=round(final_score, 3),
+        semantic_score=round(semantic_score, 3),
+        keyword_score=round(keyword_score, 3),
+        missing_keywords=missing_keywords
+    )
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    return {"status": "healthy", "service": "scoring-service"}
+    model_inference = app_state.get("model_inference")
+    return {
+        "status": "healthy",
+        "service": "scoring-service",
+        "job_embedding_cache": model_inference.job_cache_stats() if model_inference else None
+    }
+
+@app.post("/warmup", response_model=WarmupResponse)
+async def warm_up(request: WarmupRequest, model: ModelInference = Depends(get_model_inference)):
+    """Precomputes the job description embedding so the session's first /score only encodes the resume."""
+    try:
+        already_cached = await run_in_threadpool(model.warm_up, request.job_description)
+        return WarmupResponse(status="ok", already_cached=already_cached)
+    except Exception as e:
+        logger.error(f"Error during warm-up: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="An internal error occurred during warm-up.")
 
 @app.post("/score", response_model=ScoreResponse)
 async def score_resume(
@@ -53,22 +94,7 @@ async def score_resume(
         semantic_score = model.compute_match_score(request.job_description, request.resume_text)
         
         required_keywords = await extract_required_keywords(client, request.job_description)
-        if not required_keywords:
-            keyword_score = 1.0
-            missing_keywords = []
-        else:
-            present_keywords_count = len(required_keywords) - len(identify_missing_keywords(required_keywords, request.resume_text))
-            keyword_score = present_keywords_count / len(required_keywords)
-            missing_keywords = identify_missing_keywords(required_keywords, request.resume_text)
-
-        final_score = (semantic_score * 0.4) + (keyword_score * 0.6)
-
-        return ScoreResponse(
-            final_score=round(final_score, 3),
-            semantic_score=round(semantic_score, 3),
-            keyword_score=round(keyword_score, 3),
-            missing_keywords=missing_keywords
-        )
+        return build_score(semantic_score, required_keywords, request.resume_text)
     except (LLMError, httpx.HTTPError) as e:
         logger.error(f"Downstream service error during scoring: {e}", exc_info=True)
         raise HTTPException(status_code=502, detail=f"A downstream service failed: {e}")
@@ -76,6 +102,35 @@ async def score_resume(
         logger.error(f"Error during scoring process: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An internal error occurred during scoring.")
 
+@app.post("/score/batch", response_model=BatchScoreResponse)
+async def score_resumes_batch(
+    request: BatchScoreRequest,
+    model: ModelInference = Depends(get_model_inference),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
+    """Scores many resumes against one job description: one keyword extraction, one batched encode."""
+    try:
+        # The batched encode runs in a worker thread while the LLM extracts the keywords.
+        semantic_scores, required_keywords = await asyncio.gather(
+            run_in_threadpool(model.compute_match_scores, request.job_description, request.resume_texts),
+            extract_required_keywords(client, request.job_description)
+        )
+        scores = [
+            build_score(semantic_score, required_keywords, resume_text)
+            for semantic_score, resume_text in zip(semantic_scores, request.resume_texts)
+        ]
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i].final_score, reverse=True)
+        return BatchScoreResponse(results=[
+            RankedScore(**scores[i].model_dump(), index=i, rank=rank)
+            for rank, i in enumerate(ranked, start=1)
+        ])
+    except (LLMError, httpx.HTTPError) as e:
+        logger.error(f"Downstream service error during batch scoring: {e}", exc_info=True)
+        raise HTTPException(status_code=502, detail=f"A downstream service failed: {e}")
+    except Exception as e:
+        logger.error(f"Error during batch scoring process: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="An internal error occurred during batch scoring.")
+
 @app.post("/suggest", response_model=SuggestionResponse)
 async def get_suggestions(
     request: SuggestionRequest,
@@ -1,39 +1,128 @@
+import hashlib
 import logging
-from sentence_transformers import SentenceTransformer, util
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from sentence_transformers import util
 import torch
 
+from common.model_backends import load_sentence_transformer
+from common.instrumentation import track
+
 logger = logging.getLogger(__name__)
 
 class ModelInference:
-    def __init__(self, model_name: str = "anass1209/resume-job-matcher-all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "anass1209/resume-job-matcher-all-MiniLM-L6-v2",
+        backend: Optional[str] = None,
+        job_cache_size: Optional[int] = None
+    ):
         self.model_name = model_name
         self.model = None
+        # Job descriptions repeat for a whole session, so their embeddings are kept by content hash.
+        self.job_cache_size = job_cache_size if job_cache_size is not None else int(os.getenv("JOB_EMBEDDING_CACHE_SIZE", "256"))
+        self._job_embeddings: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._job_cache_lock = threading.Lock()
+        self.job_cache_hits = 0
+        self.job_cache_misses = 0
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Using device: {self.device}")
+        # ONNX backends target CPU inference; on GPU the PyTorch model is always used.
+        self.backend = (backend or os.getenv("SCORING_INFERENCE_BACKEND", "torch")).lower()
+        if self.device != "cpu":
+            self.backend = "torch"
+        logger.info(f"Using device: {self.device}, backend: {self.backend}")
 
     def load_model(self):
         try:
             logger.info(f"Loading specialized scoring model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name, device=self.device)
-            logger.info("Scoring model loaded successfully.")
+            self.model, self.backend = load_sentence_transformer(
+                self.model_name,
+                backend=self.backend,
+                device=self.device,
+                export_root=os.getenv("ONNX_EXPORT_DIR", "onnx_models"),
+                min_parity=float(os.getenv("ONNX_MIN_PARITY", "0.99"))
+            )
+            logger.info(f"Scoring model loaded successfully ({self.backend} backend).")
         except Exception as e:
             logger.error(f"Failed to load scoring model: {str(e)}")
             raise
 
+    def get_job_embedding(self, job_description: str) -> torch.Tensor:
+        """Returns the job description's embedding, encoding it only on a cache miss."""
+        return self._job_embedding(job_description)[0]
+
+    def _job_embedding(self, job_description: str) -> Tuple[torch.Tensor, bool]:
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        key = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+        with self._job_cache_lock:
+            cached = self._job_embeddings.get(key)
+            if cached is not None:
+                self._job_embeddings.move_to_end(key)
+                self.job_cache_hits += 1
+                return cached, True
+            self.job_cache_misses += 1
+
+        with track("model", "encode_job"):
+            embedding = self.model.encode(job_description, convert_to_tensor=True, device=self.device)
+        if self.job_cache_size > 0:
+            with self._job_cache_lock:
+                self._job_embeddings[key] = embedding
+                while len(self._job_embeddings) > self.job_cache_size:
+                    self._job_embeddings.popitem(last=False)
+        return embedding, False
+
+    def warm_up(self, job_description: str) -> bool:
+        """Precomputes a job description's embedding. Returns True if it was already cached."""
+        return self._job_embedding(job_description)[1]
+
+    def job_cache_stats(self) -> dict:
+        lookups = self.job_cache_hits + self.job_cache_misses
+        return {
+            "entries": len(self._job_embeddings),
+            "max_entries": self.job_cache_size,
+            "hits": self.job_cache_hits,
+            "misses": self.job_cache_misses,
+            "hit_rate": round(self.job_cache_hits / lookups, 4) if lookups else 0.0,
+        }
+
     def compute_match_score(self, job_description: str, resume_text: str) -> float:
         if self.model is None:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
         try:
-            embeddings = self.model.encode(
-                [job_description, resume_text],
-                convert_to_tensor=True,
-                device=self.device
-            )
-            cosine_score = util.cos_sim(embeddings[0], embeddings[1])
+            job_embedding = self.get_job_embedding(job_description)
+            with track("model", "encode"):
+                resume_embedding = self.model.encode(resume_text, convert_to_tensor=True, device=self.device)
+            cosine_score = util.cos_sim(job_embedding, resume_embedding)
             score = cosine_score.item()
             scaled_score = (score + 1) / 2
             return scaled_score
         except Exception as e:
             logger.error(f"Failed to compute match score with the model: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def compute_match_scores(self, job_description: str, resume_texts: List[str]) -> List[float]:
+        """Scores many resumes against one job description with a single batched encode."""
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if not resume_texts:
+            return []
+
+        try:
+            job_embedding = self.get_job_embedding(job_description)
+            with track("model", "encode_batch"):
+                resume_embeddings = self.model.encode(
+                    resume_texts,
+                    batch_size=len(resume_texts),
+                    convert_to_tensor=True,
+                    device=self.device
+                )
+            # One (1, N) similarity matrix for the whole batch.
+            cosine_scores = util.cos_sim(job_embedding, resume_embeddings)[0]
+            return ((cosine_scores + 1) / 2).tolist()
+        except Exception as e:
+            logger.error(f"Failed to compute batch match scores with the model: {e}")
+            raise
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Annotated, List, Optional, Dict, Any
 
 class ScoreRequest(BaseModel):
     job_description: str = Field(..., min_length=1)
@@ -11,12 +11,31 @@ class ScoreResponse(BaseModel):
     keyword_score: float = Field(..., description="The keyword matching score component (0 to 1).", ge=0.0, le=1.0)
     missing_keywords: List[str] = Field(..., description="Important keywords from the job description missing from the resume.")
 
+class BatchScoreRequest(BaseModel):
+    job_description: str = Field(..., min_length=1)
+    resume_texts: List[Annotated[str, Field(min_length=1)]] = Field(..., min_length=1, max_length=100)
+
+class RankedScore(ScoreResponse):
+    index: int = Field(..., description="Position of the resume in the request's resume_texts.")
+    rank: int = Field(..., description="1 for the best-matching resume.", ge=1)
+
+class BatchScoreResponse(BaseModel):
+    results: List[RankedScore] = Field(..., description="One entry per resume, sorted by final_score, best first.")
+
 class SuggestionRequest(BaseModel):
     missing_keywords: List[str] = Field(..., min_length=1)
 
 class SuggestionResponse(BaseModel):
     suggestions: List[str]
 
+class WarmupRequest(BaseModel):
+    job_description: str = Field(..., min_length=1)
+
+class WarmupResponse(BaseModel):
+    status: str
+    already_cached: bool
+
 class HealthResponse(BaseModel):
     status: str
-    service: str
\ No newline at end of file
+    service: str
+    job_embedding_cache: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -0,0 +1,182 @@
+# tests/conftest.py
+"""
+Shared fixtures: an in-memory stand-in for the pymongo collections the
+embedding service uses, and a deterministic encoder in place of the model.
+"""
+
+import copy
+import hashlib
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import OperationFailure
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+from embedding import config, db, model
+from embedding.lexical_index import LexicalIndex
+from embedding.vector_index import InMemoryVectorIndex
+
+_MISSING = object()
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+            if operator == "$exists" and (value is not _MISSING) != operand:
+                return False
+        return True
+    return value == condition
+
+def matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif not _matches_condition(document.get(field, _MISSING), condition):
+            return False
+    return True
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(document)
+    if any(projection.values()):
+        keep = {field for field, include in projection.items() if include}
+        if projection.get("_id", 1):
+            keep.add("_id")
+        return {field: copy.deepcopy(value) for field, value in document.items() if field in keep}
+    return {field: copy.deepcopy(value) for field, value in document.items() if field not in projection}
+
+class FakeCollection:
+    """Supports the subset of the pymongo Collection API used by embedding.db. `writes` counts mutations."""
+
+    def __init__(self):
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self.writes = 0
+
+    def find(self, query=None, projection=None, **kwargs) -> List[Dict[str, Any]]:
+        return [_project(doc, projection) for doc in self.documents.values() if matches(doc, query or {})]
+
+    def find_one(self, query=None, projection=None, **kwargs) -> Optional[Dict[str, Any]]:
+        found = self.find(query, projection)
+        return found[0] if found else None
+
+    def count_documents(self, query, **kwargs) -> int:
+        return len(self.find(query))
+
+    def _update(self, query, update, upsert) -> int:
+        self.writes += 1
+        for doc in self.documents.values():
+            if matches(doc, query):
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                return 1
+        if upsert:
+            doc = {key: value for key, value in query.items() if not key.startswith("$")}
+            doc.update(copy.deepcopy(update.get("$set", {})))
+            doc.setdefault("_id", f"auto-{len(self.documents)}")
+            self.documents[doc["_id"]] = doc
+        return 0
+
+    def update_one(self, query, update, upsert=False, **kwargs):
+        return SimpleNamespace(matched_count=self._update(query, update, upsert))
+
+    def bulk_write(self, operations, ordered=True, **kwargs):
+        upserted = matched = 0
+        for operation in operations:
+            if isinstance(operation, ReplaceOne):
+                self.writes += 1
+                document = copy.deepcopy(operation._doc)
+                if document["_id"] in self.documents:
+                    matched += 1
+                else:
+                    upserted += 1
+                self.documents[document["_id"]] = document
+            elif isinstance(operation, UpdateOne):
+                matched += self._update(operation._filter, operation._doc, operation._upsert)
+        return SimpleNamespace(upserted_count=upserted, matched_count=matched)
+
+    def delete_many(self, query, **kwargs):
+        doomed = [key for key, doc in self.documents.items() if matches(doc, query)]
+        for key in doomed:
+            del self.documents[key]
+        if doomed:
+            self.writes += 1
+        return SimpleNamespace(deleted_count=len(doomed))
+
+class FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def with_transaction(self, callback):
+        return callback(self)
+
+class FakeClient:
+    """A replica set member by default; a standalone server rejects sessions with transactions."""
+
+    def __init__(self, replica_set: bool = True):
+        self.replica_set = replica_set
+        self.transactions = 0
+        self.admin = SimpleNamespace(command=self._command)
+
+    def _command(self, name: str) -> Dict[str, Any]:
+        return {"isWritablePrimary": True, **({"setName": "rs0"} if self.replica_set else {})}
+
+    def start_session(self) -> FakeSession:
+        if not self.replica_set:
+            raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", code=20)
+        self.transactions += 1
+        return FakeSession()
+
+def fake_embedding(text: str) -> np.ndarray:
+    """A deterministic unit vector per text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).normal(size=config.EMBEDDING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Points embedding.db at fresh fake collections and clears the module's in-memory caches."""
+    collections = SimpleNamespace(
+        chunks=FakeCollection(), profiles=FakeCollection(), users=FakeCollection(), client=FakeClient()
+    )
+    monkeypatch.setattr(db, "get_chunks_collection", lambda: collections.chunks)
+    monkeypatch.setattr(db, "get_profiles_collection", lambda: collections.profiles)
+    monkeypatch.setattr(db, "get_users_collection", lambda: collections.users)
+    monkeypatch.setattr(db, "_client", collections.client)
+    monkeypatch.setattr(db, "_supports_transactions", None)
+    monkeypatch.setattr(db, "_result_cache", db.RetrievalResultCache(max_entries=128))
+    monkeypatch.setattr(db, "_vector_index", InMemoryVectorIndex())
+    monkeypatch.setattr(db, "_lexical_index", LexicalIndex())
+    monkeypatch.setattr(db, "_index_status_cache", {})
+    return collections
+
+@pytest.fixture
+def encoder(monkeypatch):
+    """Replaces the model with fake_embedding and records every text it is asked to encode."""
+    encoded: List[str] = []
+
+    async def embed_text_async(texts: List[str]) -> np.ndarray:
+        encoded.extend(texts)
+        return np.vstack([fake_embedding(text) for text in texts])
+
+    monkeypatch.setattr(model, "embed_text_async", embed_text_async)
+    return encoded
+
+@pytest.fixture
+def profile(mongo):
+    """Stores a profile document and returns a function that replaces it."""
+    def save(**fields) -> Dict[str, Any]:
+        document = {"_id": "profile-user1", "user_id": "user1", **fields}
+        mongo.profiles.documents[document["_id"]] = document
+        return document
+    return save
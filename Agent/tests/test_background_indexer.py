@@ -0,0 +1,82 @@
+# tests/test_background_indexer.py
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from embedding import model, services
+from embedding.background_indexer import BackgroundIndexer
+
+from conftest import fake_embedding
+
+@pytest.fixture
+def gated_encoder(monkeypatch):
+    """An encoder whose first call waits for `gate`, so a test can act while indexing is in progress."""
+    state = type("Gate", (), {})()
+    state.gate = asyncio.Event()
+    state.started = asyncio.Event()
+    state.encoded = []
+
+    async def embed_text_async(texts):
+        if not state.started.is_set():
+            state.started.set()
+            await state.gate.wait()
+        state.encoded.extend(texts)
+        return np.vstack([fake_embedding(text) for text in texts])
+
+    monkeypatch.setattr(model, "embed_text_async", embed_text_async)
+    return state
+
+def summaries(mongo):
+    return [doc["text"] for doc in mongo.chunks.documents.values() if doc.get("field_key") == "summary:0"]
+
+async def test_edit_during_indexing_is_picked_up_by_a_joining_caller(mongo, gated_encoder, profile):
+    profile(summary="Backend engineer.")
+    first = asyncio.create_task(services.index_profile_single_flight("user1"))
+    await gated_encoder.started.wait()
+
+    # The running pass already read the old profile when the edit lands.
+    profile(summary="Platform engineer.")
+    second = asyncio.create_task(services.index_profile_single_flight("user1"))
+    await asyncio.sleep(0)
+    gated_encoder.gate.set()
+    first_stats, second_stats = await asyncio.gather(first, second)
+
+    assert summaries(mongo) == ["Platform engineer."]
+    assert gated_encoder.encoded == ["Backend engineer.", "Platform engineer."]
+    assert first_stats == second_stats
+    assert services._indexing_tasks == {}
+
+async def test_joining_without_fresh_does_not_rerun(mongo, gated_encoder, profile):
+    profile(summary="Backend engineer.")
+    first = asyncio.create_task(services.index_profile_single_flight("user1"))
+    await gated_encoder.started.wait()
+
+    second = asyncio.create_task(services.index_profile_single_flight("user1", fresh=False))
+    await asyncio.sleep(0)
+    gated_encoder.gate.set()
+    await asyncio.gather(first, second)
+
+    assert gated_encoder.encoded == ["Backend engineer."]
+
+async def test_background_event_during_indexing_reindexes_the_edit(mongo, gated_encoder, profile):
+    indexer = BackgroundIndexer(debounce_seconds=0, use_change_stream=False)
+    indexer.start()
+    try:
+        profile(summary="Backend engineer.")
+        request = asyncio.create_task(services.index_profile_single_flight("user1"))
+        await gated_encoder.started.wait()
+
+        profile(summary="Platform engineer.")
+        indexer.notify("user1")
+        while not indexer.stats()["in_progress"]:
+            await asyncio.sleep(0.01)
+        gated_encoder.gate.set()
+        await request
+        while indexer.indexed == 0:
+            await asyncio.sleep(0.01)
+    finally:
+        await indexer.stop()
+
+    assert summaries(mongo) == ["Platform engineer."]
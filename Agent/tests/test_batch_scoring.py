@@ -0,0 +1,66 @@
+# tests/test_batch_scoring.py
+
+import math
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+from scoring import app as scoring_app
+from scoring.model_inference import ModelInference
+from scoring.schemas import BatchScoreRequest
+
+JOB = "Python data engineer"
+# 2-d unit vectors at known angles from the job description, so the cosine of each resume is known.
+ANGLES = {JOB: 0.0, "python airflow": 0.2, "java spring": 1.4, "python aws": 0.6}
+
+class FakeModel:
+    """Encodes each text as a unit vector at its angle in ANGLES and records every encode call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_tensor=True, device=None, batch_size=32):
+        self.calls.append(texts)
+        vector = lambda text: [math.cos(ANGLES[text]), math.sin(ANGLES[text])]
+        if isinstance(texts, str):
+            return torch.tensor(vector(texts))
+        return torch.tensor([vector(text) for text in texts])
+
+@pytest.fixture
+def inference():
+    model_inference = ModelInference(backend="torch")
+    model_inference.model = FakeModel()
+    return model_inference
+
+def test_batch_scores_match_single_scores_in_input_order(inference):
+    resumes = ["java spring", "python airflow", "python aws"]
+
+    scores = inference.compute_match_scores(JOB, resumes)
+
+    assert scores == pytest.approx([inference.compute_match_score(JOB, resume) for resume in resumes], abs=1e-6)
+    assert scores == pytest.approx([(math.cos(ANGLES[resume]) + 1) / 2 for resume in resumes], abs=1e-6)
+
+def test_batch_encodes_the_job_once_and_the_resumes_together(inference):
+    inference.compute_match_scores(JOB, ["java spring", "python airflow"])
+    inference.compute_match_scores(JOB, ["python aws"])
+
+    assert inference.model.calls == [JOB, ["java spring", "python airflow"], ["python aws"]]
+
+def test_empty_batch_encodes_nothing(inference):
+    assert inference.compute_match_scores(JOB, []) == []
+    assert inference.model.calls == []
+
+async def test_batch_endpoint_ranks_by_final_score(inference, monkeypatch):
+    async def extract_required_keywords(client, job_description):
+        return ["python"]
+
+    monkeypatch.setattr(scoring_app, "extract_required_keywords", extract_required_keywords)
+    request = BatchScoreRequest(job_description=JOB, resume_texts=["java spring", "python aws", "python airflow"])
+
+    response = await scoring_app.score_resumes_batch(request, model=inference, client=None)
+
+    assert [result.index for result in response.results] == [2, 1, 0]
+    assert [result.rank for result in response.results] == [1, 2, 3]
+    assert response.results[-1].missing_keywords == ["python"]
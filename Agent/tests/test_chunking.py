@@ -0,0 +1,72 @@
+# tests/test_chunking.py
+
+import pytest
+
+from embedding import chunking
+from embedding.chunking import _approximate_token_counts, chunk_text, split_sentences
+
+def tokens(text: str) -> int:
+    return _approximate_token_counts([text])[0]
+
+SENTENCES = [f"Sentence number {index} talks about pipelines." for index in range(12)]
+TEXT = " ".join(SENTENCES)
+
+@pytest.fixture(autouse=True)
+def approximate_tokenizer(monkeypatch):
+    monkeypatch.setattr(chunking, "_count_tokens", _approximate_token_counts)
+
+def test_sentences_split_on_punctuation_but_not_abbreviations():
+    assert list(split_sentences("Led the migration, e.g. billing. Shipped v2! Then J. Smith joined.\nNew line")) == [
+        "Led the migration, e.g. billing.", "Shipped v2!", "Then J. Smith joined.", "New line"
+    ]
+
+@pytest.mark.parametrize("max_tokens", [8, 15, 30, 100])
+def test_every_chunk_fits_the_token_budget(max_tokens):
+    chunks = chunk_text(TEXT, max_tokens=max_tokens, overlap_tokens=0)
+
+    assert chunks
+    assert all(tokens(chunk) <= max_tokens for chunk in chunks)
+
+def test_chunks_without_overlap_cover_the_text_once():
+    chunks = chunk_text(TEXT, max_tokens=30, overlap_tokens=0)
+
+    assert " ".join(chunks) == TEXT
+    assert len(chunks) > 1
+
+def test_overlap_repeats_trailing_sentences_of_the_previous_chunk():
+    chunks = chunk_text(TEXT, max_tokens=30, overlap_tokens=10)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = list(split_sentences(previous))[-1]
+        assert current.startswith(last_sentence)
+        assert tokens(current) <= 30
+    assert all(sentence in " ".join(chunks) for sentence in SENTENCES)
+
+def test_overlap_never_yields_a_chunk_with_nothing_new():
+    chunks = chunk_text(TEXT, max_tokens=30, overlap_tokens=30)
+
+    assert len(chunks) == len(set(chunks))
+    assert SENTENCES[-1] in chunks[-1]
+
+def test_overlong_sentence_is_split_on_words():
+    sentence = " ".join(f"word{index}" for index in range(50)) + "."
+
+    chunks = chunk_text(sentence, max_tokens=12, overlap_tokens=0)
+
+    assert all(tokens(chunk) <= 12 for chunk in chunks)
+    assert " ".join(chunks) == sentence
+
+def test_blank_text_yields_no_chunks():
+    assert chunk_text("   \n ") == []
+
+def test_model_tokenizer_sizes_chunks(monkeypatch):
+    # A tokenizer that splits every word into two pieces halves what fits in a chunk.
+    def tokenizer(texts, add_special_tokens):
+        return {"input_ids": [[0] * (2 * len(text.split())) for text in texts]}
+
+    chunking.set_tokenizer(tokenizer)
+
+    chunks = chunk_text(TEXT, max_tokens=30, overlap_tokens=0)
+
+    assert all(2 * len(chunk.split()) <= 30 for chunk in chunks)
+    assert " ".join(chunks) == TEXT
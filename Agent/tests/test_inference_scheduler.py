@@ -0,0 +1,80 @@
+# tests/test_inference_scheduler.py
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from embedding import model
+from embedding.model import InferenceScheduler
+
+from conftest import fake_embedding
+
+@pytest.fixture
+def encode_calls(monkeypatch):
+    """Replaces embed_text with fake_embedding and records the texts of every batch."""
+    calls = []
+
+    def embed_text(texts):
+        calls.append(list(texts))
+        return np.vstack([fake_embedding(text) for text in texts])
+
+    monkeypatch.setattr(model, "embed_text", embed_text)
+    return calls
+
+async def test_concurrent_requests_share_one_batch(encode_calls):
+    scheduler = InferenceScheduler(max_batch_size=64, window_ms=20)
+    try:
+        results = await asyncio.gather(
+            scheduler.submit(["a"]), scheduler.submit(["b", "c"]), scheduler.submit(["d"])
+        )
+    finally:
+        await scheduler.stop()
+
+    assert encode_calls == [["a", "b", "c", "d"]]
+    np.testing.assert_array_equal(results[1], np.vstack([fake_embedding("b"), fake_embedding("c")]))
+
+async def test_stop_fails_requests_of_the_batch_being_encoded(monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+
+    def embed_text(texts):
+        entered.set()
+        release.wait(5)
+        return np.vstack([fake_embedding(text) for text in texts])
+
+    monkeypatch.setattr(model, "embed_text", embed_text)
+    scheduler = InferenceScheduler(window_ms=0)
+    request = asyncio.create_task(scheduler.submit(["a"]))
+    await asyncio.get_running_loop().run_in_executor(None, entered.wait, 5)
+    executor = scheduler._executor
+
+    await scheduler.stop()
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        await asyncio.wait_for(request, 1)
+    assert executor._shutdown
+    release.set()
+
+async def test_stop_fails_requests_of_the_batch_being_collected(encode_calls):
+    scheduler = InferenceScheduler(max_batch_size=64, window_ms=10_000)
+    first = asyncio.create_task(scheduler.submit(["a"]))
+    second = asyncio.create_task(scheduler.submit(["b"]))
+    await asyncio.sleep(0.01)
+
+    await scheduler.stop()
+
+    for request in (first, second):
+        with pytest.raises(RuntimeError, match="stopped"):
+            await asyncio.wait_for(request, 1)
+    assert encode_calls == []
+
+async def test_scheduler_restarts_after_stop(encode_calls):
+    scheduler = InferenceScheduler(window_ms=0)
+    await scheduler.submit(["a"])
+    await scheduler.stop()
+
+    result = await scheduler.submit(["b"])
+    await scheduler.stop()
+
+    np.testing.assert_array_equal(result, np.vstack([fake_embedding("b")]))
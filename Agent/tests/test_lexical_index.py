@@ -0,0 +1,81 @@
+# tests/test_lexical_index.py
+
+import numpy as np
+import pytest
+
+from embedding import config, db
+from embedding.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+from conftest import fake_embedding
+
+DOCUMENTS = [
+    {"_id": "go", "section_id": "skills", "text": "Go, gRPC and Kubernetes."},
+    {"_id": "py", "section_id": "experience", "text": "Built Python pipelines; Python on Airflow, Python everywhere."},
+    {"_id": "py-short", "section_id": "experience", "text": "Python."},
+    {"_id": "cpp", "section_id": "projects", "text": "A ray tracer in C++ with CI/CD on node.js tooling."},
+]
+
+def ids(results):
+    return [doc["_id"] for doc in results]
+
+@pytest.fixture
+def index():
+    lexical_index = LexicalIndex()
+    lexical_index.load("user1", "profile", DOCUMENTS)
+    return lexical_index
+
+def test_tokenize_keeps_technology_names_whole():
+    assert tokenize("C++, C#, Node.js and CI/CD.") == ["c++", "c#", "node.js", "and", "ci/cd"]
+
+def test_bm25_ranks_matching_chunks_by_score(index):
+    results = index.search("user1", "profile", "python", 5)
+
+    assert set(ids(results)) == {"py", "py-short"}
+    assert results[0]["score"] >= results[1]["score"] > 0
+
+def test_bm25_favours_the_rarer_term(index):
+    results = index.search("user1", "profile", "python kubernetes", 5)
+
+    # "kubernetes" appears in one chunk and "python" in two, so the kubernetes chunk carries a higher idf.
+    assert ids(results)[0] == "go"
+
+def test_chunks_without_a_query_term_are_not_returned(index):
+    assert index.search("user1", "profile", "haskell", 5) == []
+    assert ids(index.search("user1", "profile", "c++", 5)) == ["cpp"]
+
+def test_section_filter_and_top_k(index):
+    assert ids(index.search("user1", "profile", "python kubernetes", 5, ["skills"])) == ["go"]
+    assert len(index.search("user1", "profile", "python kubernetes", 1)) == 1
+
+def test_rrf_prefers_documents_ranked_well_by_both_lists():
+    vector = [{"_id": "a"}, {"_id": "b"}, {"_id": "c"}]
+    lexical = [{"_id": "b"}, {"_id": "d"}, {"_id": "a"}]
+
+    fused = reciprocal_rank_fusion([vector, lexical], top_k=4, k=60)
+
+    assert ids(fused)[:2] == ["b", "a"]
+    assert set(ids(fused)) == {"a", "b", "c", "d"}
+    assert fused[0]["score"] == pytest.approx((1 / 62 + 1 / 61) / (2 / 61))
+
+def test_rrf_scores_are_normalized_and_truncated():
+    ranking = [{"_id": "a"}, {"_id": "b"}]
+
+    fused = reciprocal_rank_fusion([ranking, ranking], top_k=1)
+
+    assert fused == [{"_id": "a", "score": pytest.approx(1.0)}]
+
+def test_hybrid_search_finds_exact_terms_the_vectors_miss(mongo, monkeypatch):
+    monkeypatch.setattr(config, "VECTOR_SEARCH_BACKEND", "memory")
+    chunks = [
+        {"chunk_id": doc["_id"], "user_id": "user1", "namespace": "profile", "section_id": doc["section_id"],
+         "source_type": doc["section_id"], "source_id": "0_0", "text": doc["text"]}
+        for doc in DOCUMENTS
+    ]
+    db.store_chunks(chunks, np.vstack([fake_embedding(doc["text"]) for doc in DOCUMENTS]))
+    # A query vector unrelated to every chunk: only BM25 can put the C++ chunk first.
+    query = fake_embedding("unrelated")
+
+    results = db.search_chunks("user1", "profile", query, 2, search_mode="hybrid", query_text="c++ ray tracer")
+
+    assert ids(results)[0] == "cpp"
+    assert all(0 < doc["score"] <= 1 for doc in results)
@@ -0,0 +1,50 @@
+# tests/test_model_backends.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from common import model_backends
+from embedding import chunking, config, model
+from embedding.embedding_cache import EmbeddingCache
+
+class FakeModel:
+    tokenizer = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def encode(self, *args, **kwargs):
+        return None
+
+@pytest.fixture
+def onnx_export(monkeypatch):
+    """Stands in for the ONNX export and the PyTorch reference; `parity` sets the parity score."""
+    state = SimpleNamespace(parity=1.0)
+    monkeypatch.setattr(model_backends, "SentenceTransformer", lambda name, device=None: FakeModel("torch"))
+    monkeypatch.setattr(model_backends, "_load_onnx", lambda *args, **kwargs: FakeModel("onnx"))
+    monkeypatch.setattr(model_backends, "parity_score", lambda candidate, reference: state.parity)
+    return state
+
+def test_backend_that_passes_parity_is_reported(onnx_export):
+    loaded, backend = model_backends.load_sentence_transformer("m", backend="onnx-int8", min_parity=0.99)
+
+    assert (loaded.name, backend) == ("onnx", "onnx-int8")
+
+def test_parity_failure_reports_the_torch_fallback(onnx_export):
+    onnx_export.parity = 0.5
+
+    loaded, backend = model_backends.load_sentence_transformer("m", backend="onnx-int8", min_parity=0.99)
+
+    assert (loaded.name, backend) == ("torch", "torch")
+
+@pytest.mark.parametrize("parity, namespace", [(1.0, "m@onnx-int8"), (0.5, "m")])
+def test_embedding_cache_is_named_after_the_loaded_backend(onnx_export, monkeypatch, parity, namespace):
+    onnx_export.parity = parity
+    monkeypatch.setattr(model, "_model", None)
+    monkeypatch.setattr(model, "_cache", EmbeddingCache(model_name=config.MODEL_NAME, max_entries=8))
+    monkeypatch.setattr(chunking, "_count_tokens", chunking._count_tokens)
+
+    model.load_model("m", backend="onnx-int8")
+
+    assert model._cache.model_name == namespace
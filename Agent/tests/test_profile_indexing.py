@@ -0,0 +1,109 @@
+# tests/test_profile_indexing.py
+
+from embedding import services
+
+from conftest import fake_embedding
+
+PROFILE = {
+    "experience": [
+        {"description": "Built data pipelines in Python and Airflow."},
+        {"description": "Ran the on-call rotation for payments."},
+    ],
+    "skills": ["Python", "Kubernetes"],
+    "summary": "Backend engineer.",
+}
+
+def profile_chunks(mongo):
+    return [doc for doc in mongo.chunks.documents.values() if doc["index_namespace"] == "profile"]
+
+def chunk_texts(mongo):
+    return sorted(doc["text"] for doc in profile_chunks(mongo))
+
+async def test_first_index_embeds_every_field(mongo, encoder, profile):
+    profile(**PROFILE)
+
+    stats = await services.index_profile_from_db("user1")
+
+    assert stats["fields_changed"] == 4
+    assert stats["fields_unchanged"] == 0
+    assert sorted(encoder) == chunk_texts(mongo)
+    assert {doc["field_key"] for doc in profile_chunks(mongo)} == {
+        "experience:0", "experience:1", "skills:0", "summary:0"
+    }
+    assert mongo.users.find_one({"user_id": "user1"})["embeddings_last_updated"] is not None
+
+async def test_unchanged_profile_encodes_and_writes_nothing(mongo, encoder, profile):
+    profile(**PROFILE)
+    await services.index_profile_from_db("user1")
+    encoder.clear()
+    chunk_writes, user_writes = mongo.chunks.writes, mongo.users.writes
+
+    stats = await services.index_profile_from_db("user1")
+
+    assert stats["fields_changed"] == 0
+    assert stats["fields_unchanged"] == 4
+    assert stats["fields_removed"] == 0
+    assert encoder == []
+    assert mongo.chunks.writes == chunk_writes
+    assert mongo.users.writes == user_writes
+
+async def test_changed_field_is_the_only_one_reembedded(mongo, encoder, profile):
+    profile(**PROFILE)
+    await services.index_profile_from_db("user1")
+    untouched = {doc["_id"] for doc in profile_chunks(mongo) if doc["field_key"] != "experience:1"}
+    encoder.clear()
+
+    profile(**{**PROFILE, "experience": [PROFILE["experience"][0], {"description": "Led the billing migration."}]})
+    stats = await services.index_profile_from_db("user1")
+
+    assert stats["fields_changed"] == 1
+    assert stats["fields_unchanged"] == 3
+    assert encoder == ["Led the billing migration."]
+    assert untouched <= {doc["_id"] for doc in profile_chunks(mongo)}
+    assert "Ran the on-call rotation for payments." not in chunk_texts(mongo)
+    assert "Led the billing migration." in chunk_texts(mongo)
+
+async def test_removed_field_is_deleted(mongo, encoder, profile):
+    profile(**PROFILE)
+    await services.index_profile_from_db("user1")
+    encoder.clear()
+
+    profile(**{key: value for key, value in PROFILE.items() if key != "summary"})
+    stats = await services.index_profile_from_db("user1")
+
+    assert stats["fields_removed"] == 1
+    assert stats["fields_changed"] == 0
+    assert encoder == []
+    assert "summary:0" not in {doc["field_key"] for doc in profile_chunks(mongo)}
+
+async def test_legacy_chunks_without_field_key_are_replaced(mongo, encoder, profile):
+    profile(**PROFILE)
+    # Chunks written before fingerprinting existed carry no field_key or field_hash.
+    mongo.chunks.documents["legacy-1"] = {
+        "_id": "legacy-1", "user_id": "user1", "index_namespace": "profile", "section_id": "summary",
+        "source_type": "summary", "source_id": "0_0", "text": "Backend engineer.",
+        "embedding": fake_embedding("Backend engineer.").tolist(),
+    }
+    assert services.db.get_field_fingerprints("user1", "profile") == {None: None}
+
+    stats = await services.index_profile_from_db("user1")
+
+    assert stats["fields_changed"] == 4
+    assert stats["fields_removed"] == 1
+    assert "legacy-1" not in mongo.chunks.documents
+    assert all("field_key" in doc for doc in profile_chunks(mongo))
+    assert chunk_texts(mongo).count("Backend engineer.") == 1
+
+async def test_other_users_chunks_are_untouched(mongo, encoder, profile):
+    mongo.chunks.documents["other"] = {
+        "_id": "other", "user_id": "user2", "index_namespace": "profile", "section_id": "summary",
+        "source_type": "summary", "source_id": "0_0", "text": "Someone else.", "field_key": "summary:0",
+        "field_hash": "x", "embedding": fake_embedding("Someone else.").tolist(),
+    }
+    profile(**PROFILE)
+    await services.index_profile_from_db("user1")
+
+    profile(summary="Backend engineer.")
+    await services.index_profile_from_db("user1")
+
+    assert "other" in mongo.chunks.documents
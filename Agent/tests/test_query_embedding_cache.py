@@ -0,0 +1,94 @@
+# tests/test_query_embedding_cache.py
+
+import asyncio
+
+import pytest
+
+from retrieval.utils import QueryEmbeddingCache
+
+class Compute:
+    """Counts calls and answers after `gate` opens, so tests can overlap lookups."""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.fail = False
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("embedding service down")
+        return f"vector-{self.calls}"
+
+@pytest.fixture
+def compute():
+    compute = Compute()
+    compute.gate.set()
+    return compute
+
+async def test_concurrent_lookups_share_one_computation(compute):
+    cache = QueryEmbeddingCache()
+    compute.gate.clear()
+
+    lookups = [asyncio.create_task(cache.get_or_compute("job description", compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+    compute.gate.set()
+
+    assert await asyncio.gather(*lookups) == ["vector-1"] * 5
+    assert compute.calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["shared_in_flight"] == 4
+
+async def test_completed_lookup_is_a_hit(compute):
+    cache = QueryEmbeddingCache()
+    await cache.get_or_compute("job description", compute)
+
+    assert await cache.get_or_compute("job description", compute) == "vector-1"
+    assert compute.calls == 1
+    assert cache.stats()["hits"] == 1
+
+async def test_expired_entry_is_recomputed(compute, monkeypatch):
+    cache = QueryEmbeddingCache(ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr("retrieval.utils.time.monotonic", lambda: now[0])
+    await cache.get_or_compute("job description", compute)
+
+    now[0] += 59
+    assert await cache.get_or_compute("job description", compute) == "vector-1"
+    now[0] += 2
+    assert await cache.get_or_compute("job description", compute) == "vector-2"
+    assert compute.calls == 2
+
+async def test_failures_are_not_cached(compute):
+    cache = QueryEmbeddingCache()
+    compute.fail = True
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("job description", compute)
+
+    compute.fail = False
+    assert await cache.get_or_compute("job description", compute) == "vector-2"
+    assert cache.stats()["entries"] == 1
+
+async def test_cancelled_caller_does_not_abort_the_shared_computation(compute):
+    cache = QueryEmbeddingCache()
+    compute.gate.clear()
+    impatient = asyncio.create_task(cache.get_or_compute("job description", compute))
+    patient = asyncio.create_task(cache.get_or_compute("job description", compute))
+    await asyncio.sleep(0)
+
+    impatient.cancel()
+    compute.gate.set()
+
+    assert await patient == "vector-1"
+    assert impatient.cancelled()
+
+async def test_least_recently_used_entry_is_evicted(compute):
+    cache = QueryEmbeddingCache(max_entries=2)
+    for text in ("a", "b"):
+        await cache.get_or_compute(text, compute)
+    await cache.get_or_compute("a", compute)
+    await cache.get_or_compute("c", compute)
+
+    assert await cache.get_or_compute("a", compute) == "vector-1"
+    assert await cache.get_or_compute("b", compute) == "vector-4"
@@ -0,0 +1,115 @@
+# tests/test_request_retry.py
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from retrieval import utils
+from retrieval.utils import LatencyTracker, _make_request_with_retry
+
+URL = "http://embedding/embed"
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(utils, "RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(utils, "RETRY_MAX_DELAY", 0.002)
+    monkeypatch.setattr(utils, "request_stats", LatencyTracker())
+
+def client_for(responses):
+    """An httpx client whose n-th request gets `responses[n]`: a status code or (seconds to stall, status code)."""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        attempt = len(calls)
+        delay, status = responses[min(attempt, len(responses)) - 1]
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"attempt": attempt})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client.calls = calls
+    return client
+
+async def test_server_errors_are_retried_until_success():
+    async with client_for([(0, 503), (0, 429), (0, 200)]) as client:
+        response = await _make_request_with_retry(client, "POST", URL, json={})
+
+    assert response.json() == {"attempt": 3}
+    assert utils.request_stats.retries == 2
+
+async def test_not_found_is_not_retried():
+    async with client_for([(0, 404)]) as client:
+        with pytest.raises(HTTPException) as raised:
+            await _make_request_with_retry(client, "POST", URL, json={})
+
+    assert raised.value.status_code == 404
+    assert len(client.calls) == 1
+
+async def test_exhausted_retries_surface_a_bad_gateway():
+    async with client_for([(0, 500)]) as client:
+        with pytest.raises(HTTPException) as raised:
+            await _make_request_with_retry(client, "POST", URL, json={})
+
+    assert raised.value.status_code == 502
+    assert len(client.calls) == utils.MAX_RETRIES + 1
+
+async def test_stalled_attempts_never_exceed_the_budget():
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    async with client_for([(10, 200)]) as client:
+        with pytest.raises(HTTPException) as raised:
+            await _make_request_with_retry(client, "POST", URL, budget_seconds=0.3, json={})
+
+    assert raised.value.status_code == 502
+    assert loop.time() - started < 0.5
+    # Each attempt gets a share of what is left, so the first stall does not use up the budget.
+    assert len(client.calls) == utils.MAX_RETRIES + 1
+
+def warm_up(key: str, seconds: float) -> None:
+    for _ in range(utils.HEDGE_MIN_SAMPLES):
+        utils.request_stats.record(key, seconds)
+
+async def test_slow_request_is_hedged_and_the_fast_copy_wins(monkeypatch):
+    monkeypatch.setattr(utils, "HEDGE_REQUESTS", True)
+    warm_up("embed", 0.01)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async with client_for([(5, 200), (0, 200)]) as client:
+        response = await _make_request_with_retry(client, "POST", URL, hedge_key="embed", json={})
+
+    assert response.json() == {"attempt": 2}
+    assert loop.time() - started < 1
+    assert utils.request_stats.hedges == 1
+    assert utils.request_stats.hedge_wins == 1
+
+async def test_fast_request_is_not_hedged(monkeypatch):
+    monkeypatch.setattr(utils, "HEDGE_REQUESTS", True)
+    warm_up("embed", 0.5)
+
+    async with client_for([(0, 200)]) as client:
+        await _make_request_with_retry(client, "POST", URL, hedge_key="embed", json={})
+
+    assert len(client.calls) == 1
+    assert utils.request_stats.hedges == 0
+
+async def test_hedging_waits_for_enough_latency_samples(monkeypatch):
+    monkeypatch.setattr(utils, "HEDGE_REQUESTS", True)
+    utils.request_stats.record("embed", 0.01)
+
+    async with client_for([(0.1, 200)]) as client:
+        await _make_request_with_retry(client, "POST", URL, hedge_key="embed", json={})
+
+    assert len(client.calls) == 1
+
+async def test_hedged_copy_failing_falls_back_to_the_primary(monkeypatch):
+    monkeypatch.setattr(utils, "HEDGE_REQUESTS", True)
+    warm_up("embed", 0.01)
+
+    async with client_for([(0.1, 200), (0, 503)]) as client:
+        response = await _make_request_with_retry(client, "POST", URL, hedge_key="embed", json={})
+
+    assert response.json() == {"attempt": 1}
+    assert utils.request_stats.hedge_wins == 0
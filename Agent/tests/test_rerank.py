@@ -0,0 +1,81 @@
+# tests/test_rerank.py
+
+import numpy as np
+import pytest
+
+from embedding import config, db
+from embedding.rerank import maximal_marginal_relevance
+
+from conftest import fake_embedding
+
+QUERY = fake_embedding("python pipelines")
+
+@pytest.fixture
+def atlas_pipelines(mongo, monkeypatch):
+    """Records every aggregation pipeline sent to the chunks collection by the Atlas backend."""
+    monkeypatch.setattr(config, "VECTOR_SEARCH_BACKEND", "atlas")
+    pipelines = []
+
+    def aggregate(pipeline, **kwargs):
+        pipelines.append(pipeline)
+        return []
+
+    monkeypatch.setattr(mongo.chunks, "aggregate", aggregate, raising=False)
+    return pipelines
+
+def test_over_fetching_is_clamped_to_the_atlas_candidate_limit(atlas_pipelines, monkeypatch):
+    monkeypatch.setattr(config, "MMR_CANDIDATE_MULTIPLIER", 4)
+    monkeypatch.setattr(config, "HYBRID_CANDIDATE_MULTIPLIER", 4)
+
+    db.search_chunks("user1", "profile", QUERY, 100, search_mode="hybrid", query_text="python", diversity=0.5)
+
+    vector_search = atlas_pipelines[0][0]["$vectorSearch"]
+    assert vector_search["numCandidates"] == 10000
+    assert vector_search["limit"] == 1600
+
+def test_small_searches_keep_ten_candidates_per_result(atlas_pipelines):
+    db.search_chunks("user1", "profile", QUERY, 5)
+
+    vector_search = atlas_pipelines[0][0]["$vectorSearch"]
+    assert vector_search["numCandidates"] == 50
+    assert vector_search["limit"] == 5
+
+def test_zero_diversity_keeps_relevance_order():
+    relevance = np.array([0.2, 0.9, 0.5], dtype=np.float32)
+    vectors = np.vstack([fake_embedding(text) for text in ("a", "b", "c")])
+
+    assert maximal_marginal_relevance(relevance, vectors, 3, diversity=0.0) == [1, 2, 0]
+
+def test_diversity_skips_near_duplicates():
+    python = fake_embedding("python")
+    vectors = np.vstack([python, python * 0.99 + fake_embedding("noise") * 0.01, fake_embedding("kubernetes")])
+    relevance = np.array([0.95, 0.94, 0.80], dtype=np.float32)
+
+    assert maximal_marginal_relevance(relevance, vectors, 2, diversity=0.0) == [0, 1]
+    assert maximal_marginal_relevance(relevance, vectors, 2, diversity=0.7) == [0, 2]
+
+def test_top_k_is_capped_by_the_candidate_count():
+    vectors = np.vstack([fake_embedding(text) for text in ("a", "b")])
+
+    assert sorted(maximal_marginal_relevance(np.array([0.5, 0.4]), vectors, 5, diversity=0.5)) == [0, 1]
+    assert maximal_marginal_relevance(np.zeros(0), np.zeros((0, 4)), 3, diversity=0.5) == []
+
+def test_diversity_search_returns_top_k_distinct_sections(mongo, monkeypatch):
+    monkeypatch.setattr(config, "VECTOR_SEARCH_BACKEND", "memory")
+    texts = {
+        "a": "Built data pipelines in Python.", "b": "Built data pipelines in Python!",
+        "c": "Ran Kubernetes clusters.",
+    }
+    db.store_chunks(
+        [{"chunk_id": key, "user_id": "user1", "namespace": "profile", "section_id": key, "source_type": "experience",
+          "source_id": "0_0", "text": text} for key, text in texts.items()],
+        np.vstack([fake_embedding(texts["a"]), fake_embedding(texts["a"]) * 0.99 + fake_embedding("x") * 0.01,
+                   fake_embedding(texts["c"])]),
+    )
+    query = fake_embedding(texts["a"])
+
+    plain = db.search_chunks("user1", "profile", query, 2)
+    diverse = db.search_chunks("user1", "profile", query, 2, diversity=0.7)
+
+    assert {doc["_id"] for doc in plain} == {"a", "b"}
+    assert [doc["_id"] for doc in diverse] == ["a", "c"]
@@ -0,0 +1,134 @@
+# tests/test_result_cache.py
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from embedding import config, db
+from embedding.result_cache import RetrievalResultCache
+
+from conftest import fake_embedding
+
+QUERY = fake_embedding("python pipelines")
+
+def store(text: str, user_id: str = "user1", section_id: str = "experience") -> str:
+    chunk = {
+        "chunk_id": f"{user_id}-{text}", "user_id": user_id, "namespace": "profile", "section_id": section_id,
+        "source_type": section_id, "source_id": "0_0", "text": text,
+    }
+    db.store_chunks([chunk], np.vstack([fake_embedding(text)]))
+    return chunk["chunk_id"]
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    monkeypatch.setattr(config, "VECTOR_SEARCH_BACKEND", "memory")
+
+def test_bump_makes_older_keys_unreachable():
+    cache = RetrievalResultCache(max_entries=8)
+    key = cache.key("user1", "profile", QUERY, 5, None)
+    cache.put(key, [{"_id": "a"}])
+    assert cache.get(cache.key("user1", "profile", QUERY, 5, None)) == [{"_id": "a"}]
+
+    cache.bump("user1")
+
+    assert cache.get(cache.key("user1", "profile", QUERY, 5, None)) is None
+    assert cache.get(key) == [{"_id": "a"}]
+
+def test_bump_is_per_user():
+    cache = RetrievalResultCache(max_entries=8)
+    cache.put(cache.key("user2", "profile", QUERY, 5, None), [{"_id": "b"}])
+
+    cache.bump("user1")
+
+    assert cache.get(cache.key("user2", "profile", QUERY, 5, None)) == [{"_id": "b"}]
+
+def test_index_stamp_is_part_of_the_key():
+    cache = RetrievalResultCache(max_entries=8)
+    cache.put(cache.key("user1", "profile", QUERY, 5, None, index_stamp=1), [{"_id": "a"}])
+
+    assert cache.get(cache.key("user1", "profile", QUERY, 5, None, index_stamp=2)) is None
+
+def test_lru_evicts_least_recently_used():
+    cache = RetrievalResultCache(max_entries=2)
+    keys = [cache.key("user1", "profile", QUERY, top_k, None) for top_k in (1, 2, 3)]
+    cache.put(keys[0], [])
+    cache.put(keys[1], [])
+    cache.get(keys[0])
+    cache.put(keys[2], [])
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == []
+
+def test_repeated_search_is_served_from_cache(mongo, memory_backend):
+    store("Built data pipelines in Python.")
+    db.mark_user_indexed("user1")
+
+    first = db.search_chunks("user1", "profile", QUERY, 5)
+    reads = len(db._vector_index._partitions)
+    second = db.search_chunks("user1", "profile", QUERY, 5)
+
+    assert second == first
+    assert db.get_result_cache_stats()["hits"] == 1
+    assert len(db._vector_index._partitions) == reads
+
+def test_chunk_write_invalidates_cached_results(mongo, memory_backend):
+    store("Built data pipelines in Python.")
+    db.mark_user_indexed("user1")
+    assert len(db.search_chunks("user1", "profile", QUERY, 5)) == 1
+
+    new_id = store("Python pipelines on Airflow.")
+
+    results = db.search_chunks("user1", "profile", QUERY, 5)
+    assert new_id in {doc["_id"] for doc in results}
+    assert db.get_result_cache_stats()["hits"] == 0
+
+def test_chunk_delete_invalidates_cached_results(mongo, memory_backend):
+    store("Built data pipelines in Python.", section_id="experience")
+    store("Python and Kubernetes.", section_id="skills")
+    db.mark_user_indexed("user1")
+    assert len(db.search_chunks("user1", "profile", QUERY, 5)) == 2
+
+    db.delete_chunks_by_section_id("user1", "skills", namespace="profile")
+
+    assert [doc["section_id"] for doc in db.search_chunks("user1", "profile", QUERY, 5)] == ["experience"]
+
+def test_write_by_another_process_is_seen_once_the_stamp_is_reread(mongo, memory_backend, monkeypatch):
+    monkeypatch.setattr(config, "INDEX_STATUS_TTL_SECONDS", 0.0)
+    store("Built data pipelines in Python.")
+    db.mark_user_indexed("user1")
+    assert len(db.search_chunks("user1", "profile", QUERY, 5)) == 1
+
+    # Another process writes a chunk and stamps the user; this process's version counter never moves.
+    mongo.chunks.documents["remote"] = {
+        **mongo.chunks.find_one({}), "_id": "remote", "text": "Python pipelines on Airflow."
+    }
+    later = datetime.now(timezone.utc) + timedelta(seconds=1)
+    mongo.users.update_one({"user_id": "user1"}, {"$set": {"embeddings_last_updated": later.replace(tzinfo=None)}})
+
+    assert "remote" in {doc["_id"] for doc in db.search_chunks("user1", "profile", QUERY, 5)}
+    assert "remote" in {doc["_id"] for doc in db.search_chunks_lexical("user1", "profile", "airflow", 5)}
+
+def test_forgotten_users_never_see_results_from_before_their_last_write():
+    cache = RetrievalResultCache(max_entries=8, max_users=2)
+    stale = cache.key("user1", "profile", QUERY, 5, None)
+    cache.put(stale, [{"_id": "old"}])
+    cache.bump("user1")
+    fresh = cache.key("user1", "profile", QUERY, 5, None)
+    cache.put(fresh, [{"_id": "new"}])
+
+    cache.bump("user2")
+    cache.bump("user3")
+
+    assert len(cache._versions) == 2
+    assert cache.get(cache.key("user1", "profile", QUERY, 5, None)) != [{"_id": "old"}]
+
+def test_forgetting_a_user_does_not_resurrect_an_unwritten_users_entries():
+    cache = RetrievalResultCache(max_entries=8, max_users=1)
+    # user2 was never written, so its entries are keyed by the version shared by unknown users.
+    cache.put(cache.key("user2", "profile", QUERY, 5, None), [{"_id": "old"}])
+    cache.bump("user2")
+    cache.bump("user1")
+
+    assert "user2" not in cache._versions
+    assert cache.get(cache.key("user2", "profile", QUERY, 5, None)) is None
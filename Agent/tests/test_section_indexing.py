@@ -0,0 +1,98 @@
+# tests/test_section_indexing.py
+
+import asyncio
+
+import pytest
+
+from embedding import db, services
+
+from conftest import FakeClient
+
+def section_texts(mongo, section_id: str = "summary"):
+    return sorted(
+        doc["text"] for doc in mongo.chunks.documents.values()
+        if doc["index_namespace"] == "resume_sections" and doc["section_id"] == section_id
+    )
+
+async def test_unchanged_section_save_writes_nothing(mongo, encoder):
+    first = await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+    encoder.clear()
+    chunk_writes, user_writes = mongo.chunks.writes, mongo.users.writes
+
+    second = await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+
+    assert second == first
+    assert encoder == []
+    assert mongo.chunks.writes == chunk_writes
+    assert mongo.users.writes == user_writes
+
+async def test_changed_section_replaces_its_chunks(mongo, encoder):
+    await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+    await services.index_resume_section("user1", "skills", "Python, Go.")
+
+    chunk_ids = await services.index_resume_section("user1", "summary", "Platform engineer.")
+
+    assert section_texts(mongo) == ["Platform engineer."]
+    assert set(chunk_ids) <= set(mongo.chunks.documents)
+    assert section_texts(mongo, "skills") == ["Python, Go."]
+
+async def test_concurrent_saves_leave_exactly_one_version(mongo, encoder):
+    await asyncio.gather(
+        services.index_resume_section("user1", "summary", "Version A."),
+        services.index_resume_section("user1", "summary", "Version B."),
+    )
+
+    assert section_texts(mongo) in (["Version A."], ["Version B."])
+    assert services._section_locks == {}
+
+async def test_section_changed_by_another_process_is_retried(mongo, encoder, monkeypatch):
+    await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+    stored_ids = set(mongo.chunks.documents)
+    get_section_chunk_ids = db.get_section_chunk_ids
+    reads = []
+
+    def stale_then_fresh(*args):
+        reads.append(args)
+        if len(reads) == 1:
+            # The read sees a stale chunk next to the one being kept; then another
+            # process replaces the section before this transaction runs.
+            mongo.chunks.documents.clear()
+            return stored_ids | {"stale-chunk"}
+        return get_section_chunk_ids(*args)
+
+    monkeypatch.setattr(db, "get_section_chunk_ids", stale_then_fresh)
+
+    await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+
+    assert len(reads) == 2
+    assert section_texts(mongo) == ["Backend engineer who ships."]
+
+def test_replacement_refuses_to_keep_a_vanished_chunk(mongo):
+    with pytest.raises(db.SectionChangedError):
+        db.replace_section_chunks("user1", "resume_sections", "summary", ["gone"], [], [])
+
+async def test_replica_set_replaces_sections_in_a_transaction(mongo, encoder):
+    await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+
+    assert db.supports_transactions()
+    assert mongo.client.transactions == 1
+
+async def test_standalone_deployment_replaces_sections_without_a_transaction(mongo, encoder, monkeypatch):
+    monkeypatch.setattr(db, "_client", FakeClient(replica_set=False))
+
+    await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+    await services.index_resume_section("user1", "summary", "Platform engineer.")
+
+    assert not db.supports_transactions()
+    assert section_texts(mongo) == ["Platform engineer."]
+
+async def test_rejected_transaction_falls_back_to_plain_writes(mongo, encoder, monkeypatch):
+    # `hello` reports a replica set, but the server still refuses transactions.
+    client = FakeClient()
+    monkeypatch.setattr(client, "start_session", FakeClient(replica_set=False).start_session)
+    monkeypatch.setattr(db, "_client", client)
+
+    await services.index_resume_section("user1", "summary", "Backend engineer who ships.")
+
+    assert section_texts(mongo) == ["Backend engineer who ships."]
+    assert db._supports_transactions is False
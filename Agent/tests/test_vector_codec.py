@@ -0,0 +1,86 @@
+# tests/test_vector_codec.py
+
+import base64
+
+import bson
+import numpy as np
+import pytest
+from bson.binary import Binary
+
+from embedding import config, db
+from embedding.vector_codec import (
+    BSON_VECTOR_SUBTYPE, decode_vectors, encode_vectors, from_bson_vector, to_bson_vector, vectors_to_bytes
+)
+
+from conftest import fake_embedding
+
+MATRIX = np.vstack([fake_embedding(text) for text in ("python", "kubernetes", "airflow")])
+
+def test_float32_round_trip_is_exact():
+    decoded = decode_vectors(encode_vectors(MATRIX, "base64_f32"), "base64_f32", MATRIX.shape[1])
+
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, MATRIX)
+
+def test_float16_round_trip_is_close_and_half_the_size():
+    encoded = encode_vectors(MATRIX, "base64_f16")
+    decoded = decode_vectors(encoded, "base64_f16", MATRIX.shape[1])
+
+    assert decoded.shape == MATRIX.shape
+    np.testing.assert_allclose(decoded, MATRIX, atol=1e-3)
+    assert len(base64.b64decode(encoded)) * 2 == len(base64.b64decode(encode_vectors(MATRIX, "base64_f32")))
+
+def test_single_vector_decodes_to_one_row():
+    assert decode_vectors(encode_vectors(MATRIX[0], "base64_f32"), "base64_f32", MATRIX.shape[1]).shape == (1, MATRIX.shape[1])
+
+def test_encoding_is_little_endian():
+    assert base64.b64decode(encode_vectors(np.array([1.0]), "base64_f32")) == b"\x00\x00\x80\x3f"
+    assert vectors_to_bytes(MATRIX) == base64.b64decode(encode_vectors(MATRIX, "base64_f32"))
+
+@pytest.mark.parametrize("payload", ["not base64!", "", base64.b64encode(b"\x00" * 6).decode("ascii")])
+def test_malformed_payloads_are_rejected(payload):
+    with pytest.raises(ValueError):
+        decode_vectors(payload, "base64_f32", 4)
+
+def bson_round_trip(value):
+    """Stores `value` in a BSON document and reads it back, as a Mongo write and read would."""
+    return bson.decode(bson.encode({"embedding": value}))["embedding"]
+
+def test_float32_bson_vector_round_trip_is_exact():
+    stored, scale = to_bson_vector(MATRIX[0], "float32")
+
+    assert isinstance(stored, Binary) and stored.subtype == BSON_VECTOR_SUBTYPE
+    assert scale is None
+    assert len(stored) == 2 + 4 * MATRIX.shape[1]
+    np.testing.assert_array_equal(from_bson_vector(bson_round_trip(stored)), MATRIX[0])
+
+def test_int8_bson_vector_round_trip_is_within_one_quantization_step():
+    stored, scale = to_bson_vector(MATRIX[0], "int8")
+
+    decoded = from_bson_vector(bson_round_trip(stored), scale)
+
+    assert len(stored) == 2 + MATRIX.shape[1]
+    assert np.max(np.abs(decoded - MATRIX[0])) <= scale / 2 + 1e-6
+
+def test_legacy_arrays_are_still_decoded():
+    stored, scale = to_bson_vector(MATRIX[0], "array")
+
+    assert isinstance(stored, list) and scale is None
+    np.testing.assert_allclose(from_bson_vector(bson_round_trip(stored)), MATRIX[0], rtol=1e-6)
+
+def test_unknown_bson_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        from_bson_vector(Binary(bytes((0x10, 0)) + b"\x00" * 4, BSON_VECTOR_SUBTYPE))
+
+@pytest.mark.parametrize("storage_format", ["float32", "int8", "array"])
+def test_stored_chunks_read_back_in_every_format(mongo, monkeypatch, storage_format):
+    monkeypatch.setattr(config, "EMBEDDING_STORAGE_FORMAT", storage_format)
+    chunk = {
+        "chunk_id": "c1", "user_id": "user1", "namespace": "profile", "section_id": "summary",
+        "source_type": "summary", "source_id": "0_0", "text": "Backend engineer.",
+    }
+    db.store_chunks([chunk], MATRIX[:1])
+
+    vectors = db.get_chunk_embeddings("user1", "profile", ["c1"])
+
+    np.testing.assert_allclose(vectors["c1"], MATRIX[0], atol=0.01)
@@ -0,0 +1,66 @@
+# tests/test_vector_index.py
+
+import numpy as np
+import pytest
+
+from embedding import config, db
+from embedding.lexical_index import LexicalIndex
+from embedding.vector_index import InMemoryVectorIndex
+
+from conftest import fake_embedding
+
+QUERY = fake_embedding("python pipelines")
+
+def store(text: str, user_id: str = "user1") -> None:
+    chunk = {
+        "chunk_id": f"{user_id}-{text}", "user_id": user_id, "namespace": "profile", "section_id": "experience",
+        "source_type": "experience", "source_id": "0_0", "text": text,
+    }
+    db.store_chunks([chunk], np.vstack([fake_embedding(text)]))
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    monkeypatch.setattr(config, "VECTOR_SEARCH_BACKEND", "memory")
+
+def test_partition_read_before_a_concurrent_write_is_not_kept(mongo, memory_backend, monkeypatch):
+    store("Built data pipelines in Python.")
+    db.mark_user_indexed("user1")
+    find = mongo.chunks.find
+
+    def find_then_write(*args, **kwargs):
+        documents = find(*args, **kwargs)
+        monkeypatch.setattr(mongo.chunks, "find", find)
+        store("Python pipelines on Airflow.")
+        return documents
+
+    monkeypatch.setattr(mongo.chunks, "find", find_then_write)
+
+    assert len(db.search_chunks_vector("user1", "profile", QUERY, 5)) == 1
+    assert len(db.search_chunks_vector("user1", "profile", QUERY, 5)) == 2
+
+def documents(text: str):
+    return [{"_id": text, "section_id": "experience", "text": text, "embedding": fake_embedding(text).tolist()}]
+
+@pytest.mark.parametrize("index_type", [InMemoryVectorIndex, LexicalIndex])
+def test_least_recently_used_partition_is_evicted_on_load(index_type):
+    index = index_type(max_partitions=2)
+    index.load("user1", "profile", documents("a"))
+    index.load("user2", "profile", documents("b"))
+    assert index.get("user1", "profile") is not None
+
+    index.load("user3", "profile", documents("c"))
+
+    assert index.get("user2", "profile") is None
+    assert index.get("user1", "profile") is not None
+    assert index.get("user3", "profile") is not None
+    assert len(index._partitions) == 2
+
+def test_evicted_partition_is_reloaded_on_the_next_search(mongo, memory_backend, monkeypatch):
+    monkeypatch.setattr(db, "_vector_index", InMemoryVectorIndex(max_partitions=1))
+    store("Built data pipelines in Python.", user_id="user1")
+    store("Ran Kubernetes clusters.", user_id="user2")
+    db.search_chunks_vector("user1", "profile", QUERY, 5)
+    db.search_chunks_vector("user2", "profile", QUERY, 5)
+
+    assert [doc["user_id"] for doc in db.search_chunks_vector("user1", "profile", QUERY, 5)] == ["user1"]
+    assert list(db._vector_index._partitions) == [("user1", "profile")]